@@ -0,0 +1,12 @@
+import pytest
+from core.middleware import get_report, reset_report
+
+
+@pytest.fixture(autouse=True)
+def query_budget(settings):
+    """Fail any request that runs more queries than QUERY_BUDGETS allows."""
+    settings.QUERY_BUDGET_ENABLED = True
+    settings.QUERY_BUDGET_STRICT = True
+    reset_report()
+    yield get_report
+    reset_report()
@@ -0,0 +1,7 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def eager_jobs(settings):
+    """Run background jobs in-process instead of queueing them on disk."""
+    settings.JOBS_ALWAYS_EAGER = True
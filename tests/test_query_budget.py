@@ -0,0 +1,29 @@
+import pytest
+from django.core.cache import cache
+
+pytestmark = [pytest.mark.django_db]
+
+
+class TestQueryBudget:
+
+    def test_feeds_within_budget(self, user_client, few_posts_with_group,
+                                 query_budget):
+        cache.clear()
+        post = few_posts_with_group
+        urls = {
+            'post:index': '/',
+            'post:group_list': f'/group/{post.group.slug}/',
+            'post:profile': f'/{post.author.username}/',
+            'post:post_detail': f'/{post.author.username}/{post.id}/',
+            'post:follow_index': '/follow/',
+        }
+        for url in urls.values():
+            response = user_client.get(url)
+            assert response.status_code == 200, (
+                f'Страница `{url}` должна открываться'
+            )
+        report = query_budget()
+        for view_name in urls:
+            assert report[view_name]['requests'] == 1, (
+                f'Проверьте, что запросы к `{view_name}` попадают в отчёт'
+            )
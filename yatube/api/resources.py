@@ -0,0 +1,117 @@
+"""JSON representations of posts, comments, groups and follows.
+
+A resource maps every public field to the model columns it needs and a
+function producing its value. A ``fields=`` list is turned into
+``.only()`` and ``select_related()`` on the queryset, so a response loads
+no more columns or joins than it returns. Columns the cursor is built
+from are always loaded.
+"""
+from posts.models import Comment, Follow, Group, Post
+
+
+class InvalidFields(ValueError):
+    pass
+
+
+class Field:
+    def __init__(self, columns, value):
+        self.columns = tuple(columns)
+        self.value = value
+
+    @property
+    def relations(self):
+        return {
+            column.rsplit('__', 1)[0]
+            for column in self.columns if '__' in column}
+
+
+def _attr(path):
+    names = path.split('.')
+
+    def value(obj):
+        for name in names:
+            obj = getattr(obj, name)
+            if obj is None:
+                return None
+        return obj
+    return value
+
+
+def _date(path):
+    get = _attr(path)
+
+    def value(obj):
+        date = get(obj)
+        return date.isoformat() if date is not None else None
+    return value
+
+
+def _image(obj):
+    return obj.image.url if obj.image else None
+
+
+class Resource:
+    def __init__(self, model, fields, required=('pk',), default=None):
+        self.model = model
+        self.fields = fields
+        self.required = required
+        self.default = tuple(default or fields)
+
+    def parse(self, value):
+        """Field names from a ``fields=`` parameter, the default if empty."""
+        if not value:
+            return self.default
+        names = tuple(name.strip() for name in value.split(',') if name)
+        unknown = [name for name in names if name not in self.fields]
+        if unknown:
+            raise InvalidFields(
+                'Неизвестные поля: {}.'.format(', '.join(unknown)))
+        return names
+
+    def queryset(self, queryset, names):
+        columns = set(self.required)
+        relations = set()
+        for name in names:
+            field = self.fields[name]
+            columns.update(field.columns)
+            relations.update(field.relations)
+        # A relation followed by select_related cannot be deferred itself.
+        columns.update(relations)
+        queryset = queryset.select_related(None).only(*columns)
+        if relations:
+            queryset = queryset.select_related(*relations)
+        return queryset
+
+    def serialize(self, obj, names):
+        return {name: self.fields[name].value(obj) for name in names}
+
+
+posts = Resource(Post, {
+    'id': Field(('pk',), _attr('pk')),
+    'text': Field(('text',), _attr('text')),
+    'pub_date': Field(('pub_date',), _date('pub_date')),
+    'author': Field(('author__username',), _attr('author.username')),
+    'group': Field(('group__slug',), _attr('group.slug')),
+    'image': Field(('image',), _image),
+    'thumbnails': Field(('thumbnails',), _attr('thumbnail_list')),
+    'comment_count': Field(('comment_count',), _attr('comment_count')),
+}, required=('pk', 'pub_date'), default=(
+    'id', 'text', 'pub_date', 'author', 'group', 'image', 'comment_count'))
+
+comments = Resource(Comment, {
+    'id': Field(('pk',), _attr('pk')),
+    'post': Field(('post_id',), _attr('post_id')),
+    'text': Field(('text',), _attr('text')),
+    'created': Field(('created',), _date('created')),
+    'author': Field(('author__username',), _attr('author.username')),
+}, required=('pk', 'created'))
+
+groups = Resource(Group, {
+    'slug': Field(('slug',), _attr('slug')),
+    'title': Field(('title',), _attr('title')),
+    'description': Field(('description',), _attr('description')),
+}, required=('pk', 'slug'))
+
+follows = Resource(Follow, {
+    'author': Field(('author__username',), _attr('author.username')),
+}, required=('pk',))
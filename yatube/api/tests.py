@@ -0,0 +1,125 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Follow, Group, Post
+
+User = get_user_model()
+
+
+class ApiTest(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = User.objects.create(username='MakarD')
+        cls.reader = User.objects.create(username='Reader')
+        cls.group = Group.objects.create(
+            title='Котики', slug='cats', description='Про котиков')
+        cls.posts = [
+            Post.objects.create(
+                text=f'Пост {number}', author=cls.user, group=cls.group)
+            for number in range(5)]
+
+    def setUp(self) -> None:
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.reader)
+        self.author_client = Client()
+        self.author_client.force_login(self.user)
+
+    def send(self, client, method, url, data):
+        return getattr(client, method)(
+            url, json.dumps(data), content_type='application/json')
+
+    def test_sparse_fields_load_only_their_columns(self):
+        """fields= отдаёт и выбирает из базы только нужные поля."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.guest_client.get(
+                reverse('api:posts'), {'fields': 'id,author'})
+        posts = response.json()['results']
+        self.assertEqual(posts[0], {
+            'id': self.posts[-1].pk, 'author': self.user.username})
+        sql = queries[-1]['sql']
+        self.assertIn('"auth_user"."username"', sql)
+        self.assertNotIn('"posts_post"."text"', sql)
+        response = self.guest_client.get(
+            reverse('api:posts'), {'fields': 'id,password'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_cursor_pages(self):
+        url = reverse('api:posts')
+        first = self.guest_client.get(url, {'limit': 3}).json()
+        second = self.guest_client.get(
+            url, {'limit': 3, 'cursor': first['next']}).json()
+        ids = [post['id'] for post in first['results'] + second['results']]
+        self.assertEqual(ids, [post.pk for post in reversed(self.posts)])
+        self.assertIsNone(second['next'])
+        response = self.guest_client.get(url, {'cursor': 'broken'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_bulk_fetch_keeps_order_in_one_query(self):
+        ids = [self.posts[2].pk, 0, self.posts[0].pk]
+        with self.assertNumQueries(1):
+            response = self.guest_client.get(reverse('api:posts'), {
+                'ids': ','.join(map(str, ids)), 'fields': 'id,group'})
+        self.assertEqual(response.json()['results'], [
+            {'id': self.posts[2].pk, 'group': 'cats'},
+            {'id': self.posts[0].pk, 'group': 'cats'}])
+
+    def test_writes(self):
+        """Посты, комментарии и подписки создаются через API."""
+        response = self.send(self.guest_client, 'post', reverse('api:posts'), {
+            'text': 'Аноним'})
+        self.assertEqual(response.status_code, 401)
+        response = self.send(
+            self.authorized_client, 'post', reverse('api:posts'),
+            {'text': 'Новый пост', 'group': 'cats'})
+        self.assertEqual(response.status_code, 201)
+        created = Post.objects.get(pk=response.json()['id'])
+        self.assertEqual(created.author, self.reader)
+        self.assertEqual(created.group, self.group)
+
+        url = reverse('api:post', args=[self.posts[0].pk])
+        response = self.send(
+            self.authorized_client, 'patch', url, {'text': 'Чужой'})
+        self.assertEqual(response.status_code, 403)
+        response = self.send(
+            self.author_client, 'patch', url, {'text': 'Исправлено'})
+        self.assertEqual(response.json()['text'], 'Исправлено')
+        self.assertEqual(response.json()['group'], 'cats')
+
+        url = reverse('api:comments', args=[self.posts[0].pk])
+        response = self.send(
+            self.authorized_client, 'post', url, {'text': 'Отлично'})
+        self.assertEqual(response.status_code, 201)
+        comments = self.guest_client.get(url).json()['results']
+        self.assertEqual(comments[0]['author'], self.reader.username)
+
+        response = self.send(
+            self.authorized_client, 'post', reverse('api:follows'),
+            {'author': self.user.username})
+        self.assertEqual(response.status_code, 201)
+        response = self.authorized_client.delete(
+            reverse('api:follow', args=[self.user.username]))
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(Follow.objects.exists())
+
+    def test_feed(self):
+        Follow.objects.create(user=self.reader, author=self.user)
+        response = self.authorized_client.get(
+            reverse('api:feed'), {'fields': 'id', 'limit': 2})
+        self.assertEqual(response.json()['results'], [
+            {'id': self.posts[4].pk}, {'id': self.posts[3].pk}])
+        self.assertEqual(
+            self.guest_client.get(reverse('api:feed')).status_code, 401)
+
+    def test_groups(self):
+        response = self.guest_client.get(
+            reverse('api:group', args=['cats']), {'fields': 'title'})
+        self.assertEqual(response.json(), {'title': 'Котики'})
+        response = self.guest_client.get(reverse('api:groups'))
+        self.assertEqual(response.json()['results'][0]['slug'], 'cats')
@@ -0,0 +1,277 @@
+"""JSON API over the same models, forms and feeds as the HTML views.
+
+Lists are paged by cursor only: every response carries ``next`` and
+``previous`` cursors to pass back as ``cursor=``, and ``limit=`` sets the
+page size. ``fields=`` selects the fields returned (see ``resources``).
+Write requests take JSON, or form data when a post carries an image, and
+use the session of the logged-in user.
+"""
+import json
+from functools import wraps
+
+from django.conf import settings
+from django.db import transaction
+from django.http import HttpResponse, JsonResponse
+
+from core.paginator import InvalidCursor, KeysetPaginator
+from posts.forms import CommentForm, PostForm
+from posts.groups import get as get_group
+from posts.models import Comment, Follow, Group, Post, User
+from posts.timeline import ORDERING as TIMELINE_ORDERING
+from posts.timeline import user_timeline
+from posts.views import COMMENT_ORDERING, schedule_thumbnails
+
+from . import resources
+from .resources import InvalidFields
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def error(status, message, **extra):
+    return JsonResponse({'error': message, **extra}, status=status)
+
+
+def api_view(*methods, login=False):
+    """Allow only ``methods``, require a user for writes (or always)."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in methods:
+                response = error(405, 'Метод не поддерживается.')
+                response['Allow'] = ', '.join(methods)
+                return response
+            if (login or request.method != 'GET') and (
+                    not request.user.is_authenticated):
+                return error(401, 'Нужно войти.')
+            try:
+                return view(request, *args, **kwargs)
+            except (ApiError, InvalidFields) as exception:
+                return error(
+                    getattr(exception, 'status', 400), str(exception))
+        return wrapper
+    return decorator
+
+
+def request_fields(request, resource):
+    return resource.parse(request.GET.get('fields'))
+
+
+def request_data(request):
+    if request.content_type != 'application/json':
+        return request.POST, request.FILES
+    try:
+        data = json.loads(request.body or b'{}')
+    except ValueError:
+        raise ApiError(400, 'Тело запроса не является JSON.')
+    if not isinstance(data, dict):
+        raise ApiError(400, 'Ожидается JSON-объект.')
+    return data, None
+
+
+def form_errors(form):
+    return error(
+        400, 'Данные не прошли проверку.',
+        errors=form.errors.get_json_data())
+
+
+def page_size(request):
+    try:
+        limit = int(request.GET.get('limit', settings.API_PAGE_SIZE))
+    except ValueError:
+        raise ApiError(400, 'limit должен быть числом.')
+    return min(max(limit, 1), settings.API_PAGE_SIZE_MAX)
+
+
+def paginate(request, queryset, ordering=None):
+    paginator = KeysetPaginator(queryset, page_size(request), ordering)
+    cursor = request.GET.get('cursor')
+    if not cursor:
+        return paginator.page(1)
+    try:
+        return paginator.page_from_cursor(cursor)
+    except InvalidCursor:
+        raise ApiError(400, 'Неверный курсор.')
+
+
+def page_response(page, items):
+    return JsonResponse({
+        'results': items,
+        'next': page.next_cursor,
+        'previous': page.previous_cursor})
+
+
+def parse_ids(value):
+    try:
+        ids = [int(pk) for pk in value.split(',') if pk]
+    except ValueError:
+        raise ApiError(400, 'ids должен быть списком чисел.')
+    if len(ids) > settings.API_BULK_LIMIT:
+        raise ApiError(
+            400, f'Не больше {settings.API_BULK_LIMIT} записей за запрос.')
+    return ids
+
+
+def bulk_posts(ids, names):
+    """Posts with ``ids`` in the same order, one query for all of them."""
+    found = resources.posts.queryset(Post.objects.all(), names).in_bulk(ids)
+    return [
+        resources.posts.serialize(found[pk], names)
+        for pk in ids if pk in found]
+
+
+def save_post(request, form):
+    post = form.save(commit=False)
+    if post.author_id is None:
+        post.author = request.user
+    post.save()
+    if 'image' in form.changed_data and post.image:
+        schedule_thumbnails(post)
+    return post
+
+
+def post_form(request, instance=None):
+    data, files = request_data(request)
+    if instance is not None:
+        # PATCH changes only the fields it names.
+        data = {
+            'text': instance.text,
+            'group': instance.group.slug if instance.group else None,
+            **data}
+    form = PostForm(data, files=files, instance=instance)
+    form.fields['group'].to_field_name = 'slug'
+    return form
+
+
+@api_view('GET', 'POST')
+def posts(request):
+    names = request_fields(request, resources.posts)
+    if request.method == 'POST':
+        form = post_form(request)
+        if not form.is_valid():
+            return form_errors(form)
+        instance = save_post(request, form)
+        return JsonResponse(
+            resources.posts.serialize(instance, names), status=201)
+    if 'ids' in request.GET:
+        ids = parse_ids(request.GET['ids'])
+        return JsonResponse({'results': bulk_posts(ids, names)})
+    queryset = Post.objects.all()
+    if request.GET.get('author'):
+        queryset = queryset.filter(author__username=request.GET['author'])
+    if request.GET.get('group'):
+        queryset = queryset.filter(group__slug=request.GET['group'])
+    page = paginate(request, resources.posts.queryset(queryset, names))
+    return page_response(page, [
+        resources.posts.serialize(post, names) for post in page])
+
+
+@api_view('GET', 'PATCH')
+def post(request, post_id):
+    names = request_fields(request, resources.posts)
+    if request.method == 'PATCH':
+        instance = Post.objects.select_related('group').filter(
+            pk=post_id).first()
+        if instance is None:
+            raise ApiError(404, 'Пост не найден.')
+        if instance.author_id != request.user.pk:
+            raise ApiError(403, 'Изменять пост может только автор.')
+        form = post_form(request, instance)
+        if not form.is_valid():
+            return form_errors(form)
+        return JsonResponse(resources.posts.serialize(
+            save_post(request, form), names))
+    found = bulk_posts([post_id], names)
+    if not found:
+        raise ApiError(404, 'Пост не найден.')
+    return JsonResponse(found[0])
+
+
+@api_view('GET', 'POST')
+def comments(request, post_id):
+    names = request_fields(request, resources.comments)
+    if request.method == 'POST':
+        target = Post.objects.filter(pk=post_id).first()
+        if target is None:
+            raise ApiError(404, 'Пост не найден.')
+        form = CommentForm(request_data(request)[0])
+        if not form.is_valid():
+            return form_errors(form)
+        comment = form.save(commit=False)
+        comment.author = request.user
+        comment.post = target
+        with transaction.atomic():
+            comment.save()
+        return JsonResponse(
+            resources.comments.serialize(comment, names), status=201)
+    queryset = resources.comments.queryset(
+        Comment.objects.filter(post_id=post_id), names)
+    page = paginate(request, queryset, COMMENT_ORDERING)
+    if not page.object_list and not Post.objects.filter(
+            pk=post_id).exists():
+        raise ApiError(404, 'Пост не найден.')
+    return page_response(page, [
+        resources.comments.serialize(comment, names) for comment in page])
+
+
+@api_view('GET')
+def groups(request):
+    names = request_fields(request, resources.groups)
+    page = paginate(
+        request, resources.groups.queryset(Group.objects.all(), names),
+        ('slug',))
+    return page_response(page, [
+        resources.groups.serialize(group, names) for group in page])
+
+
+@api_view('GET')
+def group(request, slug):
+    names = request_fields(request, resources.groups)
+    found = get_group(slug)
+    if found is None:
+        raise ApiError(404, 'Группа не найдена.')
+    return JsonResponse(resources.groups.serialize(found, names))
+
+
+@api_view('GET', login=True)
+def feed(request):
+    """Posts of followed authors: entries are paged, posts fetched by id."""
+    names = request_fields(request, resources.posts)
+    entries = user_timeline(request.user).select_related(None).only(
+        'pk', 'pub_date', 'post')
+    page = paginate(request, entries, TIMELINE_ORDERING)
+    return page_response(
+        page, bulk_posts([entry.post_id for entry in page], names))
+
+
+@api_view('GET', 'POST', login=True)
+def follows(request):
+    names = request_fields(request, resources.follows)
+    if request.method == 'POST':
+        username = request_data(request)[0].get('author')
+        author = User.objects.filter(username=username).first()
+        if author is None:
+            raise ApiError(404, 'Автор не найден.')
+        if author == request.user:
+            raise ApiError(400, 'Нельзя подписаться на себя.')
+        follow, created = Follow.objects.get_or_create(
+            user=request.user, author=author)
+        return JsonResponse(
+            resources.follows.serialize(follow, names),
+            status=201 if created else 200)
+    queryset = resources.follows.queryset(
+        Follow.objects.filter(user=request.user), names)
+    page = paginate(request, queryset, ('-pk',))
+    return page_response(page, [
+        resources.follows.serialize(follow, names) for follow in page])
+
+
+@api_view('DELETE')
+def follow(request, username):
+    Follow.objects.filter(
+        user=request.user, author__username=username).delete()
+    return HttpResponse(status=204)
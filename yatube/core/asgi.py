@@ -0,0 +1,119 @@
+"""Serve a WSGI application to ASGI servers.
+
+Django 2.2 only speaks WSGI. ``WsgiToAsgi`` reads the request body on the
+event loop and runs the WSGI application on a bounded thread pool, so an
+ASGI server holds many slow clients while at most ``workers`` requests
+run views at once. Inside a view, ``core.parallel.gather`` runs the
+independent queries of the post page, the feed, following and commenting
+at the same time.
+
+The request body is spooled to a temporary file past ``spool_size``
+bytes. The response is sent in one piece once the view is done, so
+streaming responses are buffered too; serve those through WSGI.
+"""
+import asyncio
+import io
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+
+class WsgiToAsgi:
+    def __init__(self, wsgi_application, workers, spool_size=2621440):
+        self.wsgi_application = wsgi_application
+        self.spool_size = spool_size
+        self.executor = ThreadPoolExecutor(
+            workers, thread_name_prefix='asgi')
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self.lifespan(receive, send)
+        if scope['type'] != 'http':
+            raise ValueError(f'Unsupported scope type {scope["type"]}.')
+        with tempfile.SpooledTemporaryFile(self.spool_size) as body:
+            while True:
+                message = await receive()
+                if message['type'] == 'http.disconnect':
+                    return
+                body.write(message.get('body', b''))
+                if not message.get('more_body'):
+                    break
+            environ = self.environ(scope, body)
+            loop = asyncio.get_running_loop()
+            status, headers, chunks = await loop.run_in_executor(
+                self.executor, self.run, environ)
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': headers,
+        })
+        await send({'type': 'http.response.body', 'body': b''.join(chunks)})
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=True)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    def environ(self, scope, body=None):
+        """WSGI environ of ``scope``; ``body`` is a file, read from 0."""
+        if body is None:
+            body = io.BytesIO()
+        length = body.tell()
+        body.seek(0)
+        server = scope.get('server') or ('localhost', 80)
+        client = scope.get('client') or ('', 0)
+        environ = {
+            'REQUEST_METHOD': scope['method'],
+            'SCRIPT_NAME': scope.get('root_path', ''),
+            # WSGI strings carry the raw bytes as latin-1.
+            'PATH_INFO': scope['path'].encode().decode('latin-1'),
+            'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+            'SERVER_NAME': server[0],
+            'SERVER_PORT': str(server[1]),
+            'REMOTE_ADDR': client[0],
+            'SERVER_PROTOCOL': f'HTTP/{scope.get("http_version", "1.1")}',
+            'CONTENT_LENGTH': str(length),
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': scope.get('scheme', 'http'),
+            'wsgi.input': body,
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': True,
+            'wsgi.run_once': False,
+        }
+        for name, value in scope.get('headers', []):
+            name = name.decode('latin-1').upper().replace('-', '_')
+            value = value.decode('latin-1')
+            if name not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+                name = f'HTTP_{name}'
+            if name in environ and name.startswith('HTTP_'):
+                # HTTP/2 sends each cookie as its own header.
+                separator = '; ' if name == 'HTTP_COOKIE' else ','
+                value = f'{environ[name]}{separator}{value}'
+            environ[name] = value
+        return environ
+
+    def run(self, environ):
+        """Status, headers and body chunks of one WSGI call."""
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            response['status'] = int(status.split(' ', 1)[0])
+            response['headers'] = [
+                (name.lower().encode('latin-1'), value.encode('latin-1'))
+                for name, value in headers]
+
+        result = self.wsgi_application(environ, start_response)
+        try:
+            chunks = list(result)
+        finally:
+            # Fires request_finished, which releases this thread's
+            # database connections.
+            if hasattr(result, 'close'):
+                result.close()
+        return response['status'], response['headers'], chunks
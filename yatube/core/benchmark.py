@@ -0,0 +1,71 @@
+"""Helpers shared by the benchmark management commands."""
+import math
+import time
+from collections import defaultdict
+
+
+def percentile(values, percent):
+    """Nearest-rank percentile of an unsorted list."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(math.ceil(percent / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def summarize(samples):
+    """Latency percentiles (ms) and mean of any extra per-sample numbers."""
+    latencies = [sample['latency'] * 1000 for sample in samples]
+    summary = {
+        'requests': len(samples),
+        'p50': percentile(latencies, 50),
+        'p95': percentile(latencies, 95),
+        'p99': percentile(latencies, 99),
+        'max': max(latencies, default=0.0),
+    }
+    for key in samples[0] if samples else ():
+        if key != 'latency':
+            summary[key] = sum(s[key] for s in samples) / len(samples)
+    return summary
+
+
+class Recorder:
+    """Collect per-label samples of latency plus arbitrary counters."""
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+
+    def add(self, label, latency, **extra):
+        self.samples[label].append(dict(extra, latency=latency))
+
+    def time(self, label, func, **extra):
+        start = time.perf_counter()
+        result = func()
+        self.add(label, time.perf_counter() - start, **extra)
+        return result
+
+    def report(self):
+        everything = [s for samples in self.samples.values() for s in samples]
+        report = {
+            label: summarize(samples)
+            for label, samples in sorted(self.samples.items())}
+        report['total'] = summarize(everything)
+        return report
+
+
+def format_report(report):
+    columns = ['requests', 'p50', 'p95', 'p99', 'max']
+    extra = sorted({
+        key for row in report.values() for key in row} - set(columns))
+    columns += extra
+    lines = ['{:<24}'.format('') + ''.join(
+        '{:>12}'.format(column) for column in columns)]
+    for label, row in report.items():
+        cells = []
+        for column in columns:
+            value = row.get(column, '')
+            if isinstance(value, float):
+                value = f'{value:.2f}'
+            cells.append('{:>12}'.format(value))
+        lines.append('{:<24}'.format(label) + ''.join(cells))
+    return '\n'.join(lines)
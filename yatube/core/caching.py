@@ -0,0 +1,187 @@
+"""Two-tier cache: a small in-process LRU in front of a shared backend.
+
+``TwoTierCache`` is a cache backend. Reads are served from a per-process
+LRU bounded by bytes and fall through to the shared tier, another alias in
+``CACHES`` named by ``OPTIONS['SHARED']`` (Redis in production, a file or
+locmem cache locally). Writes go to both tiers; local entries live at most
+``LOCAL_TIMEOUT`` seconds. Atomic operations (``add``, ``incr``) always run
+on the shared tier.
+
+Data that must change everywhere at once is keyed by a namespace version:
+``version`` reads it from the shared tier on every call, ``make_key`` puts
+it into the key and ``invalidate`` bumps it, which retires every entry of
+the namespace in every process without deleting anything.
+"""
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import cache, caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+_missing = object()
+_locals = {}
+_locals_lock = threading.Lock()
+
+
+class LocalLRU:
+    """Pickled values with a deadline, evicted by least recent use."""
+
+    def __init__(self, max_bytes, timeout):
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._data.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                self._pop(key)
+            self.misses += 1
+            return None
+
+    def set(self, key, pickled, timeout=None):
+        if timeout is None or timeout > self.timeout:
+            timeout = self.timeout
+        with self._lock:
+            self._pop(key)
+            if timeout <= 0 or len(pickled) > self.max_bytes:
+                return
+            self._data[key] = (time.monotonic() + timeout, pickled)
+            self.size += len(pickled)
+            while self.size > self.max_bytes:
+                self._pop(next(iter(self._data)))
+
+    def delete(self, key):
+        with self._lock:
+            self._pop(key)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.size = 0
+
+    def _pop(self, key):
+        entry = self._data.pop(key, None)
+        if entry is not None:
+            self.size -= len(entry[1])
+
+    def __len__(self):
+        return len(self._data)
+
+
+class TwoTierCache(BaseCache):
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.shared_alias = options.get('SHARED', 'shared')
+        with _locals_lock:
+            # Backends are created per thread; the local tier is per process.
+            self.local = _locals.setdefault(location, LocalLRU(
+                options.get('LOCAL_MAX_BYTES', 16 * 1024 * 1024),
+                options.get('LOCAL_TIMEOUT', 5)))
+
+    @property
+    def shared(self):
+        return caches[self.shared_alias]
+
+    def _local_timeout(self, timeout):
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        return timeout
+
+    def get(self, key, default=None, version=None):
+        local_key = self.make_key(key, version)
+        self.validate_key(local_key)
+        pickled = self.local.get(local_key)
+        if pickled is not None:
+            return pickle.loads(pickled)
+        value = self.shared.get(key, _missing, version=version)
+        if value is _missing:
+            return default
+        self.local.set(local_key, pickle.dumps(value))
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.shared.set(key, value, timeout, version=version)
+        self.local.set(
+            self.make_key(key, version), pickle.dumps(value),
+            self._local_timeout(timeout))
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        if not self.shared.add(key, value, timeout, version=version):
+            return False
+        self.local.set(
+            self.make_key(key, version), pickle.dumps(value),
+            self._local_timeout(timeout))
+        return True
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.shared.touch(key, timeout, version=version)
+
+    def delete(self, key, version=None):
+        self.local.delete(self.make_key(key, version))
+        self.shared.delete(key, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        self.local.delete(self.make_key(key, version))
+        return self.shared.incr(key, delta, version=version)
+
+    def has_key(self, key, version=None):
+        return (
+            self.local.get(self.make_key(key, version)) is not None
+            or self.shared.has_key(key, version=version))
+
+    def clear(self):
+        self.local.clear()
+        self.shared.clear()
+
+
+def _shared():
+    return getattr(cache, 'shared', cache)
+
+
+def _version_key(namespace):
+    return f'version:{namespace}'
+
+
+def version(namespace):
+    shared = _shared()
+    key = _version_key(namespace)
+    value = shared.get(key)
+    if value is None:
+        # Start from the clock so that an evicted counter never comes back
+        # to a value that old entries were stored under.
+        shared.add(key, int(time.time() * 1000), timeout=None)
+        value = shared.get(key)
+    return value
+
+
+def invalidate(namespace):
+    try:
+        _shared().incr(_version_key(namespace))
+    except ValueError:
+        version(namespace)
+
+
+def make_key(namespace, key):
+    return f'{namespace}:{version(namespace)}:{key}'
+
+
+def get_or_set(namespace, key, default, timeout=DEFAULT_TIMEOUT):
+    """Cached value of ``default()`` until the namespace is invalidated."""
+    full_key = make_key(namespace, key)
+    value = cache.get(full_key, _missing)
+    if value is _missing:
+        value = default() if callable(default) else default
+        cache.set(full_key, value, timeout)
+    return value
@@ -0,0 +1,17 @@
+from django.db.backends.sqlite3 import base
+
+from core.db.pool import PooledDatabaseWrapper
+
+
+class TunedDatabaseWrapper(base.DatabaseWrapper):
+    """Runs ``settings_dict['PRAGMAS']`` on every new connection."""
+
+    def get_new_connection(self, conn_params):
+        connection = super().get_new_connection(conn_params)
+        for name, value in self.settings_dict.get('PRAGMAS', {}).items():
+            connection.execute(f'PRAGMA {name} = {value}')
+        return connection
+
+
+class DatabaseWrapper(PooledDatabaseWrapper, TunedDatabaseWrapper):
+    pass
@@ -0,0 +1,229 @@
+"""Bounded per-process pool of database connections.
+
+The backends in ``core.db.backends`` take their connections from a pool
+when ``DATABASES[alias]['POOL']['SIZE']`` is set. With ``CONN_MAX_AGE = 0``
+Django closes the connection of every request when it ends; the pooled
+backends hand it back to the pool instead, so a process keeps at most
+``SIZE`` connections open and reuses them across threads and requests.
+A thread that finds every connection taken waits up to ``TIMEOUT``
+seconds. Connections older than ``RECYCLE`` seconds are replaced, and
+with ``CONN_HEALTH_CHECKS`` an idle one is pinged before it is handed out.
+
+``CONN_HEALTH_CHECKS`` also covers persistent connections without a pool
+(``CONN_MAX_AGE > 0``): the connection is checked once per request before
+its first query, as in later Django versions.
+
+Checkouts, new connections, wait time and timeouts are counted per alias,
+see ``stats``; time spent waiting also shows up as ``db_wait`` in the
+query budget report.
+"""
+import threading
+import time
+from collections import deque
+
+from django.db import OperationalError
+
+from core.middleware import current_metrics
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class PoolTimeout(OperationalError):
+    pass
+
+
+def ping(raw):
+    try:
+        cursor = raw.cursor()
+        try:
+            cursor.execute('SELECT 1')
+        finally:
+            cursor.close()
+    except Exception:
+        return False
+    return True
+
+
+def _discard(raw):
+    try:
+        raw.close()
+    except Exception:
+        pass
+
+
+class ConnectionPool:
+    def __init__(self, size, timeout=10, recycle=None, health_checks=False):
+        self.size = size
+        self.timeout = timeout
+        self.recycle = recycle
+        self.health_checks = health_checks
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        # Idle connections with their creation time, the latest returned
+        # on the right: reusing it first lets the others age out.
+        self._idle = deque()
+        self._created = {}
+        self.checkouts = 0
+        self.connections = 0
+        self.discarded = 0
+        self.timeouts = 0
+        self.wait_time = 0.0
+        self.max_wait = 0.0
+
+    def acquire(self, connect):
+        """An open connection: an idle one, or a new one from ``connect``."""
+        start = time.perf_counter()
+        if not self._slots.acquire(timeout=self.timeout):
+            with self._lock:
+                self.timeouts += 1
+            raise PoolTimeout(
+                f'No database connection was free for {self.timeout}s '
+                f'(pool size {self.size}).')
+        waited = time.perf_counter() - start
+        with self._lock:
+            self.checkouts += 1
+            self.wait_time += waited
+            self.max_wait = max(self.max_wait, waited)
+        metrics = current_metrics()
+        if metrics is not None:
+            metrics.db_wait += waited
+        try:
+            raw = self._take_idle()
+            if raw is None:
+                raw = connect()
+                with self._lock:
+                    self.connections += 1
+                    self._created[id(raw)] = time.monotonic()
+            return raw
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def _take_idle(self):
+        while True:
+            with self._lock:
+                if not self._idle:
+                    return None
+                raw = self._idle.pop()
+                created = self._created.get(id(raw), 0)
+            expired = self.recycle is not None and (
+                time.monotonic() - created > self.recycle)
+            if not expired and (not self.health_checks or ping(raw)):
+                return raw
+            self._forget(raw)
+
+    def release(self, raw, usable=True):
+        try:
+            if usable:
+                with self._lock:
+                    self._idle.append(raw)
+            else:
+                self._forget(raw)
+        finally:
+            self._slots.release()
+
+    def _forget(self, raw):
+        _discard(raw)
+        with self._lock:
+            self.discarded += 1
+            self._created.pop(id(raw), None)
+
+    def close(self):
+        """Close the idle connections; those in use are kept."""
+        with self._lock:
+            idle, self._idle = list(self._idle), deque()
+        for raw in idle:
+            self._forget(raw)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': self.size,
+                'idle': len(self._idle),
+                'in_use': len(self._created) - len(self._idle),
+                'checkouts': self.checkouts,
+                'connections': self.connections,
+                'discarded': self.discarded,
+                'timeouts': self.timeouts,
+                'wait_time': self.wait_time,
+                'max_wait': self.max_wait,
+            }
+
+
+def get_pool(alias, settings_dict):
+    """The pool of ``alias`` in this process, None without ``POOL``."""
+    options = settings_dict.get('POOL') or {}
+    if not options.get('SIZE'):
+        return None
+    with _pools_lock:
+        if alias not in _pools:
+            _pools[alias] = ConnectionPool(
+                options['SIZE'],
+                timeout=options.get('TIMEOUT', 10),
+                recycle=options.get('RECYCLE'),
+                health_checks=settings_dict.get('CONN_HEALTH_CHECKS', False))
+        return _pools[alias]
+
+
+def stats():
+    with _pools_lock:
+        pools = dict(_pools)
+    return {alias: pool.stats() for alias, pool in pools.items()}
+
+
+def close_all():
+    """Close the idle connections of every pool in this process."""
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        pool.close()
+
+
+class PooledDatabaseWrapper:
+    """Mixin for a backend's ``DatabaseWrapper``, listed before it."""
+
+    health_check_done = False
+
+    @property
+    def pool(self):
+        return get_pool(self.alias, self.settings_dict)
+
+    def get_new_connection(self, conn_params):
+        pool = self.pool
+        if pool is None:
+            return super().get_new_connection(conn_params)
+        return pool.acquire(
+            lambda: super(PooledDatabaseWrapper, self).get_new_connection(
+                conn_params))
+
+    def connect(self):
+        super().connect()
+        self.health_check_done = True
+
+    def _close(self):
+        pool = self.pool
+        if pool is None or self.connection is None:
+            return super()._close()
+        usable = not self.in_atomic_block
+        if usable:
+            try:
+                self.connection.rollback()
+            except Exception:
+                usable = False
+        if usable and self.errors_occurred:
+            usable = ping(self.connection)
+        pool.release(self.connection, usable)
+
+    def close_if_unusable_or_obsolete(self):
+        super().close_if_unusable_or_obsolete()
+        self.health_check_done = False
+
+    def ensure_connection(self):
+        if (self.connection is not None and not self.health_check_done
+                and not self.in_atomic_block
+                and self.settings_dict.get('CONN_HEALTH_CHECKS')):
+            if not self.is_usable():
+                self.close()
+            self.health_check_done = True
+        super().ensure_connection()
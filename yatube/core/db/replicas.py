@@ -0,0 +1,91 @@
+"""Feed reads from read replicas, with read-your-writes for the writer.
+
+Views decorated with ``read_from_replica`` read the models of
+``REPLICA_APPS`` from one of ``REPLICA_DATABASES``, chosen per request;
+everything else, and every write, goes to ``default``. A view that writes
+calls ``pin``: ``ReplicaPinMiddleware`` then sets a signed cookie, and for
+``REPLICA_PIN_SECONDS`` that browser reads from the primary, so it sees its
+own post, comment or follow before the replicas have caught up.
+
+Locally a replica is a second SQLite file refreshed from the primary by
+``manage.py sync_replica``.
+"""
+import random
+import threading
+from contextlib import contextmanager
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+PIN_COOKIE = 'pin_primary'
+
+_state = threading.local()
+
+
+def current_replica():
+    return getattr(_state, 'alias', None)
+
+
+@contextmanager
+def replica_reads(alias):
+    previous = current_replica()
+    _state.alias = alias
+    try:
+        yield
+    finally:
+        _state.alias = previous
+
+
+def pin(request):
+    """Send this browser's reads to the primary for a while."""
+    request.pin_primary = True
+
+
+def is_pinned(request):
+    return getattr(request, 'pin_primary', False) or (
+        request.get_signed_cookie(
+            PIN_COOKIE, None, max_age=settings.REPLICA_PIN_SECONDS)
+        is not None)
+
+
+def read_from_replica(view):
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        replicas = settings.REPLICA_DATABASES
+        if not replicas or request.method not in ('GET', 'HEAD') or (
+                is_pinned(request)):
+            return view(request, *args, **kwargs)
+        request.replica = random.choice(replicas)
+        with replica_reads(request.replica):
+            return view(request, *args, **kwargs)
+    return wrapper
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        alias = current_replica()
+        if alias is not None and (
+                model._meta.app_label in settings.REPLICA_APPS):
+            return alias
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        # Objects read from a replica are saved to the primary too.
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+
+class ReplicaPinMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if getattr(request, 'pin_primary', False):
+            response.set_signed_cookie(
+                PIN_COOKIE, '1', max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True, samesite='Lax')
+        return response
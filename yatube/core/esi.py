@@ -0,0 +1,106 @@
+"""Full-page cache with per-user holes, in the spirit of edge side includes.
+
+``{% esi 'template.html' key=value %}`` writes a marker instead of a
+fragment that depends on the visitor (nav bar, edit buttons) while a view
+wrapped in ``cache_page`` renders. ``EsiMiddleware`` replaces the markers
+of the responses ``cache_page`` returns with the fragments rendered for
+the current request, so a page body can be cached once and served to
+anonymous and logged-in users alike. Only templates listed in
+``settings.ESI_TEMPLATES`` become holes; other markers are left alone.
+Fragment templates get their keyword arguments (as strings) and the
+context processors' variables, nothing else from the page.
+"""
+import hashlib
+import re
+from functools import wraps
+from urllib.parse import parse_qsl, urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.template.loader import render_to_string
+
+from core import caching
+from core.db.replicas import is_pinned
+
+MARKER_RE = re.compile(r'<!--esi:([\w./-]+)\?([^>]*)-->')
+
+
+def is_hole(request, template_name):
+    """Whether the fragment is rendered per request by ``EsiMiddleware``."""
+    return (getattr(request, 'esi', False)
+            and template_name in settings.ESI_TEMPLATES)
+
+
+def marker(template_name, kwargs):
+    return f'<!--esi:{template_name}?{urlencode(kwargs)}-->'
+
+
+def render_fragment(request, template_name, kwargs):
+    return render_to_string(template_name, kwargs, request=request)
+
+
+def fill(content, request):
+    def replace(match):
+        if match.group(1) not in settings.ESI_TEMPLATES:
+            return match.group(0)
+        kwargs = dict(parse_qsl(match.group(2), keep_blank_values=True))
+        return render_fragment(request, match.group(1), kwargs)
+    return MARKER_RE.sub(replace, content)
+
+
+class EsiMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (not getattr(response, 'esi', False) or response.streaming
+                or 'text/html' not in response.get('Content-Type', '')):
+            return response
+        content = response.content.decode(response.charset)
+        if '<!--esi:' in content:
+            response.content = fill(content, request)
+            if response.has_header('Content-Length'):
+                response['Content-Length'] = len(response.content)
+        return response
+
+
+def cache_page(namespace, timeout=None):
+    """Cache a view's HTML, markers included, by URL and query string.
+
+    Entries live under the ``core.caching`` version of ``namespace``, so
+    bumping it drops every cached page at once. The view renders holes as
+    markers and the response is flagged for ``EsiMiddleware`` to fill. A
+    page read from a replica may lag behind that version and is kept for
+    ``REPLICA_PIN_SECONDS`` at most; browsers pinned to the primary skip
+    the cache.
+    """
+    if timeout is None:
+        timeout = settings.PAGE_CACHE_TIMEOUT
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD') or is_pinned(request):
+                return view(request, *args, **kwargs)
+            digest = hashlib.md5(request.get_full_path().encode()).hexdigest()
+            key = caching.make_key(namespace, f'page:{digest}')
+            cached = cache.get(key)
+            if cached is not None:
+                content, content_type = cached
+                response = HttpResponse(content, content_type=content_type)
+                response.esi = True
+                return response
+            request.esi = True
+            response = view(request, *args, **kwargs)
+            response.esi = True
+            if (response.status_code == 200 and not response.streaming
+                    and not response.cookies):
+                cache.set(
+                    key, (response.content, response['Content-Type']),
+                    min(timeout, settings.REPLICA_PIN_SECONDS)
+                    if getattr(request, 'replica', None) else timeout)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,41 @@
+"""Conditional GET and HTTP caching headers for page views."""
+from functools import wraps
+
+from django.conf import settings
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views.decorators.http import condition
+
+
+def conditional_page(etag_func):
+    """Answer revalidations with 304 using ``etag_func`` and mark caching.
+
+    ``etag_func(request, *args, **kwargs)`` runs before the view, for GET
+    and HEAD only, and should be much cheaper than the view. Anonymous
+    responses may be kept by shared caches for ``HTTP_CACHE_MAX_AGE``
+    seconds; responses for logged-in users are private and revalidated
+    on every use.
+    """
+    def etag(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return None
+        return etag_func(request, *args, **kwargs)
+
+    def decorator(view):
+        conditional_view = condition(etag_func=etag)(view)
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            response = conditional_view(request, *args, **kwargs)
+            if request.method not in ('GET', 'HEAD') or (
+                    response.status_code not in (200, 304)):
+                return response
+            if request.user.is_authenticated:
+                patch_cache_control(response, private=True, no_cache=True)
+            else:
+                patch_cache_control(
+                    response, public=True,
+                    max_age=settings.HTTP_CACHE_MAX_AGE)
+            patch_vary_headers(response, ['Cookie'])
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,115 @@
+"""File-backed background job queue.
+
+A job is a JSON file naming a dotted-path callable and its arguments.
+``enqueue`` drops it into ``JOBS_DIR/pending``; ``manage.py run_worker``
+claims jobs by renaming them into ``running`` (atomic, so several workers
+can share a directory) and removes them once done. Failed jobs go back to
+the end of the queue until ``JOBS_MAX_ATTEMPTS`` is reached, then to
+``failed``. With ``JOBS_ALWAYS_EAGER`` jobs run immediately in-process.
+"""
+import json
+import logging
+import os
+import time
+import uuid
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from core.middleware import collect
+
+logger = logging.getLogger(__name__)
+
+PENDING = 'pending'
+RUNNING = 'running'
+FAILED = 'failed'
+
+
+def _path(state, name=''):
+    return os.path.join(settings.JOBS_DIR, state, name)
+
+
+def _write(state, job):
+    os.makedirs(_path(state), exist_ok=True)
+    name = f'{time.time():017.6f}-{job["id"]}.json'
+    temporary = _path(state, f'.{name}.tmp')
+    with open(temporary, 'w') as stream:
+        json.dump(job, stream)
+    os.replace(temporary, _path(state, name))
+
+
+def _names(state):
+    try:
+        return sorted(
+            name for name in os.listdir(_path(state))
+            if not name.startswith('.'))
+    except FileNotFoundError:
+        return []
+
+
+def enqueue(task, *args, **kwargs):
+    job = {
+        'id': uuid.uuid4().hex,
+        'task': task,
+        'args': args,
+        'kwargs': kwargs,
+        'attempts': 0,
+    }
+    if settings.JOBS_ALWAYS_EAGER:
+        # Work a worker would do: kept out of the request's query budget.
+        with collect(None):
+            run(job)
+    else:
+        _write(PENDING, job)
+    return job['id']
+
+
+def run(job):
+    try:
+        import_string(job['task'])(*job['args'], **job['kwargs'])
+    except Exception:
+        logger.exception('Job %s (%s) failed', job['id'], job['task'])
+        return False
+    return True
+
+
+def claim():
+    os.makedirs(_path(RUNNING), exist_ok=True)
+    for name in _names(PENDING):
+        target = _path(RUNNING, name)
+        try:
+            os.rename(_path(PENDING, name), target)
+        except FileNotFoundError:
+            continue
+        os.utime(target)
+        with open(target) as stream:
+            return name, json.load(stream)
+    return None
+
+
+def work_one():
+    claimed = claim()
+    if claimed is None:
+        return False
+    name, job = claimed
+    if not run(job):
+        job['attempts'] += 1
+        if job['attempts'] >= settings.JOBS_MAX_ATTEMPTS:
+            _write(FAILED, job)
+        else:
+            _write(PENDING, job)
+    os.remove(_path(RUNNING, name))
+    return True
+
+
+def requeue_stale(timeout):
+    """Return jobs left in ``running`` by a dead worker to the queue."""
+    deadline = time.time() - timeout
+    for name in _names(RUNNING):
+        path = _path(RUNNING, name)
+        try:
+            if os.path.getmtime(path) < deadline:
+                os.makedirs(_path(PENDING), exist_ok=True)
+                os.rename(path, _path(PENDING, name))
+        except FileNotFoundError:
+            continue
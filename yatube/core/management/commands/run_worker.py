@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core import jobs
+
+
+class Command(BaseCommand):
+    help = 'Run background jobs from the file queue in JOBS_DIR.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Exit when the queue is empty.')
+        parser.add_argument('--poll', type=float, default=1.0)
+        parser.add_argument(
+            '--stale-after', type=float, default=600,
+            help='Seconds after which a running job is considered lost.')
+
+    def handle(self, *args, **options):
+        jobs.requeue_stale(options['stale_after'])
+        done = 0
+        while True:
+            close_old_connections()
+            if jobs.work_one():
+                done += 1
+                continue
+            if options['once']:
+                break
+            time.sleep(options['poll'])
+            jobs.requeue_stale(options['stale_after'])
+        self.stdout.write(f'Processed {done} jobs.')
@@ -0,0 +1,40 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+class Command(BaseCommand):
+    help = (
+        'Copy the primary SQLite database into the replica files, once or '
+        'every --every seconds, to try replica routing locally.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--every', type=float,
+            help='Keep copying with this pause, in seconds.')
+
+    def handle(self, *args, **options):
+        primary = connections['default']
+        if primary.vendor != 'sqlite':
+            raise CommandError(
+                'Only SQLite files are copied; replicate other databases '
+                'with their own tools.')
+        if not settings.REPLICA_DATABASES:
+            raise CommandError('No replica; set DB_REPLICA.')
+        while True:
+            primary.ensure_connection()
+            for alias in settings.REPLICA_DATABASES:
+                target = sqlite3.connect(connections[alias].settings_dict[
+                    'NAME'])
+                try:
+                    primary.connection.backup(target)
+                finally:
+                    target.close()
+                self.stdout.write(f'Copied default to {alias}.')
+            primary.close()
+            if options['every'] is None:
+                break
+            time.sleep(options['every'])
@@ -0,0 +1,185 @@
+"""Per-view query budgets.
+
+``QueryBudgetMiddleware`` counts SQL queries, SQL time, template render
+time and cache hits for every request and aggregates them by resolved view
+name. A view that runs more queries than ``QUERY_BUDGETS`` allows is
+logged, or fails the request when ``QUERY_BUDGET_STRICT`` is on (tests).
+"""
+import csv
+import json
+import logging
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.template.base import Template
+
+logger = logging.getLogger(__name__)
+
+REPORT_FIELDS = (
+    'view', 'requests', 'queries', 'max_queries', 'sql_time',
+    'render_time', 'cache_hits', 'cache_misses', 'db_wait',
+)
+
+_local = threading.local()
+_lock = threading.Lock()
+_report = {}
+_missing = object()
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.queries = 0
+        self.sql_time = 0.0
+        self.render_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.db_wait = 0.0
+        self.rendering = False
+
+
+def current_metrics():
+    return getattr(_local, 'metrics', None)
+
+
+def _record_sql(execute, sql, params, many, context):
+    metrics = current_metrics()
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        if metrics is not None:
+            metrics.queries += 1
+            metrics.sql_time += time.perf_counter() - start
+
+
+@contextmanager
+def collect(metrics):
+    """Count this thread's queries into ``metrics`` (skipped for None)."""
+    previous = current_metrics()
+    _local.metrics = metrics
+    try:
+        with ExitStack() as stack:
+            if metrics is not None:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(_record_sql))
+            yield
+    finally:
+        _local.metrics = previous
+
+
+def _instrument_templates():
+    original = Template.render
+    if getattr(original, 'instrumented', False):
+        return
+
+    def render(self, context):
+        metrics = current_metrics()
+        if metrics is None or metrics.rendering:
+            return original(self, context)
+        metrics.rendering = True
+        start = time.perf_counter()
+        try:
+            return original(self, context)
+        finally:
+            metrics.rendering = False
+            metrics.render_time += time.perf_counter() - start
+
+    render.instrumented = True
+    Template.render = render
+
+
+def _instrument_cache(backend):
+    original = backend.get
+    if getattr(original, 'instrumented', False):
+        return
+
+    def get(self, key, default=None, version=None):
+        value = original(self, key, _missing, version=version)
+        metrics = current_metrics()
+        if metrics is not None:
+            if value is _missing:
+                metrics.cache_misses += 1
+            else:
+                metrics.cache_hits += 1
+        return default if value is _missing else value
+
+    get.instrumented = True
+    backend.get = get
+
+
+def record(view_name, metrics):
+    with _lock:
+        entry = _report.setdefault(view_name, dict.fromkeys(
+            REPORT_FIELDS[1:], 0))
+        entry['requests'] += 1
+        entry['queries'] += metrics.queries
+        entry['max_queries'] = max(entry['max_queries'], metrics.queries)
+        entry['sql_time'] += metrics.sql_time
+        entry['render_time'] += metrics.render_time
+        entry['cache_hits'] += metrics.cache_hits
+        entry['cache_misses'] += metrics.cache_misses
+        entry['db_wait'] += metrics.db_wait
+
+
+def get_report():
+    with _lock:
+        return {view: dict(entry) for view, entry in _report.items()}
+
+
+def reset_report():
+    with _lock:
+        _report.clear()
+
+
+def dump_report(stream, format='json'):
+    report = get_report()
+    if format == 'json':
+        json.dump(report, stream, indent=2, sort_keys=True)
+        return
+    writer = csv.DictWriter(stream, fieldnames=REPORT_FIELDS)
+    writer.writeheader()
+    for view, entry in sorted(report.items()):
+        writer.writerow(dict(entry, view=view))
+
+
+class QueryBudgetMiddleware:
+    def __init__(self, get_response):
+        if not settings.QUERY_BUDGET_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        _instrument_templates()
+        tiers = {
+            params.get('OPTIONS', {}).get('SHARED')
+            for params in settings.CACHES.values()}
+        for alias in settings.CACHES:
+            # Reads through a two-tier cache are counted once, at the top.
+            if alias not in tiers:
+                _instrument_cache(type(caches[alias]))
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        with collect(metrics):
+            response = self.get_response(request)
+
+        match = request.resolver_match
+        view_name = match.view_name if match else request.path
+        record(view_name, metrics)
+        budget = settings.QUERY_BUDGETS.get(view_name)
+        if budget is not None and metrics.queries > budget:
+            message = (
+                f'{view_name} ran {metrics.queries} queries, '
+                f'the budget is {budget}')
+            if settings.QUERY_BUDGET_STRICT:
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        return response
@@ -0,0 +1,183 @@
+import base64
+import json
+
+from django.core.paginator import (EmptyPage, Page, PageNotAnInteger,
+                                   Paginator)
+from django.db.models import Q
+from django.utils.functional import SimpleLazyObject, cached_property
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+class KeysetPaginator(Paginator):
+    """Paginator that seeks by the ordering key instead of using OFFSET.
+
+    Pages reached through ``cursor`` cost the same at any depth. Plain page
+    numbers are still served (with OFFSET) for the numbered links, and the
+    total is only counted when something actually asks for it. ``count``
+    takes a known total, ``count_limit`` bounds the COUNT query and marks
+    the result as approximate.
+
+    Every page carries ``next_cursor`` and ``previous_cursor``; use them
+    instead of ``has_next()``, which needs the total. Its ``page_links``
+    are the numbered links to render (see ``get_elided_page_range``).
+    """
+    ordering = ('-pub_date', '-pk')
+    ELLIPSIS = '…'
+    on_each_side = 3
+    on_ends = 2
+
+    def __init__(self, object_list, per_page, ordering=None, count=None,
+                 count_limit=None, **kwargs):
+        if ordering is not None:
+            self.ordering = tuple(ordering)
+        super().__init__(
+            object_list.order_by(*self.ordering), per_page, **kwargs)
+        self.count_limit = count_limit
+        self.is_approximate = False
+        if count is not None:
+            self.count = count
+
+    @cached_property
+    def count(self):
+        if self.count_limit is None:
+            return self.object_list.count()
+        count = self.object_list[:self.count_limit].count()
+        self.is_approximate = count >= self.count_limit
+        return count
+
+    def validate_number(self, number):
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger('That page number is not an integer')
+        if number < 1:
+            raise EmptyPage('That page number is less than 1')
+        return number
+
+    def get_page(self, number=None, cursor=None):
+        if cursor:
+            try:
+                return self.page_from_cursor(cursor)
+            except InvalidCursor:
+                pass
+        try:
+            return self.page(number)
+        except PageNotAnInteger:
+            return self.page(1)
+        except EmptyPage:
+            return self.page(max(self.num_pages, 1))
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        items = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not items and number > 1:
+            raise EmptyPage('That page contains no results')
+        has_next = len(items) > self.per_page
+        return self.build_page(
+            items[:self.per_page], number, has_next, number > 1)
+
+    def page_from_cursor(self, cursor):
+        direction, values, number = self.decode_cursor(cursor)
+        forward = direction == 'n'
+        queryset = self.object_list.filter(self._seek(values, forward))
+        if not forward:
+            queryset = queryset.reverse()
+        items = list(queryset[:self.per_page + 1])
+        has_more = len(items) > self.per_page
+        items = items[:self.per_page]
+        if not items:
+            return self.page(1)
+        if forward:
+            return self.build_page(items, number, has_more, True)
+        items.reverse()
+        if not has_more:
+            number = 1
+        return self.build_page(items, number, True, has_more)
+
+    def build_page(self, items, number, has_next, has_previous):
+        next_cursor = previous_cursor = None
+        if items and has_next:
+            next_cursor = self.encode_cursor('n', items[-1], number + 1)
+        if items and has_previous:
+            previous_cursor = self.encode_cursor('p', items[0], number - 1)
+        page = Page(items, number, self)
+        page.next_cursor = next_cursor
+        page.previous_cursor = previous_cursor
+        # A list built on first use, so that the total is only counted when
+        # the links are rendered.
+        page.page_links = SimpleLazyObject(
+            lambda: list(self.get_elided_page_range(number)))
+        return page
+
+    def get_elided_page_range(self, number=1, on_each_side=None,
+                              on_ends=None):
+        """Page numbers around ``number`` and at both ends, gaps elided.
+
+        Yields at most ``2 * (on_each_side + on_ends) + 3`` items whatever
+        the total, ``ELLIPSIS`` standing for each gap. The last pages are
+        left out when the total is approximate.
+        """
+        if on_each_side is None:
+            on_each_side = self.on_each_side
+        if on_ends is None:
+            on_ends = self.on_ends
+        num_pages = max(self.num_pages, number)
+        if num_pages <= (on_each_side + on_ends) * 2:
+            yield from range(1, num_pages + 1)
+            return
+        if number > 1 + on_each_side + on_ends + 1:
+            yield from range(1, on_ends + 1)
+            yield self.ELLIPSIS
+            yield from range(number - on_each_side, number + 1)
+        else:
+            yield from range(1, number + 1)
+        if number < num_pages - on_each_side - on_ends - 1:
+            yield from range(number + 1, number + on_each_side + 1)
+            yield self.ELLIPSIS
+            if not self.is_approximate:
+                yield from range(num_pages - on_ends + 1, num_pages + 1)
+        else:
+            yield from range(number + 1, num_pages + 1)
+
+    def _fields(self):
+        model = self.object_list.model
+        for name in self.ordering:
+            attr = name.lstrip('-')
+            field = model._meta.pk if attr == 'pk' else (
+                model._meta.get_field(attr))
+            yield attr, field, name.startswith('-')
+
+    def _seek(self, values, forward):
+        condition = Q()
+        equal = Q()
+        for (attr, _, descending), value in zip(self._fields(), values):
+            lookup = 'lt' if descending == forward else 'gt'
+            condition |= equal & Q(**{f'{attr}__{lookup}': value})
+            equal &= Q(**{attr: value})
+        return condition
+
+    def encode_cursor(self, direction, obj, number):
+        values = [field.value_to_string(obj) for _, field, _ in self._fields()]
+        payload = json.dumps([direction, values, number])
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            direction, raw, number = json.loads(
+                base64.urlsafe_b64decode(padded.encode()).decode())
+            fields = list(self._fields())
+            if direction not in ('n', 'p') or len(raw) != len(fields):
+                raise InvalidCursor(cursor)
+            values = [
+                field.to_python(value)
+                for (_, field, _), value in zip(fields, raw)]
+            return direction, values, max(int(number), 1)
+        except InvalidCursor:
+            raise
+        except Exception as error:
+            raise InvalidCursor(cursor) from error
@@ -0,0 +1,57 @@
+"""Run the independent queries of a view at the same time.
+
+Django 2.2 has no async views, so ``gather`` overlaps queries with
+threads: the first function runs in the calling thread, the others on a
+shared pool of ``PARALLEL_QUERY_WORKERS`` threads, each with its own
+database connection (from ``core.db.pool`` when it is on, so its ``SIZE``
+should cover the request threads plus these workers). Replica routing and
+query counting follow the request into the workers. Put anything that
+touches the request (``request.user`` loads the session and the user)
+first, so it stays in the request's thread.
+
+Inside a transaction the functions run one after another: other
+connections would not see its uncommitted rows.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connection, connections
+
+from core.db.replicas import current_replica, replica_reads
+from core.middleware import collect, current_metrics
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                settings.PARALLEL_QUERY_WORKERS,
+                thread_name_prefix='queries')
+        return _executor
+
+
+def _run(func, replica, metrics):
+    try:
+        with replica_reads(replica), collect(metrics):
+            return func()
+    finally:
+        # Back to the pool (or closed) like at the end of a request.
+        connections.close_all()
+
+
+def gather(*funcs):
+    """Results of calling ``funcs``, in order; exceptions propagate."""
+    if (len(funcs) < 2 or not settings.PARALLEL_QUERY_WORKERS
+            or connection.in_atomic_block):
+        return [func() for func in funcs]
+    executor = _get_executor()
+    futures = [
+        executor.submit(_run, func, current_replica(), current_metrics())
+        for func in funcs[1:]]
+    first = funcs[0]()
+    return [first] + [future.result() for future in futures]
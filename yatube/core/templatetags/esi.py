@@ -0,0 +1,20 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from core.esi import is_hole, marker, render_fragment
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def esi(context, template_name, **kwargs):
+    """Hole for a per-user fragment, filled by ``EsiMiddleware``.
+
+    Outside ``cache_page`` views the fragment is rendered in place.
+    """
+    kwargs = {key: '' if value is None else value
+              for key, value in kwargs.items()}
+    request = context.get('request')
+    if not is_hole(request, template_name):
+        return mark_safe(render_fragment(request, template_name, kwargs))
+    return mark_safe(marker(template_name, kwargs))
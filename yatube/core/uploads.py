@@ -0,0 +1,48 @@
+import logging
+import time
+
+from django.conf import settings
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+
+def _max_rss():
+    if resource is None:
+        return 0
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+class StreamingUploadHandler(TemporaryFileUploadHandler):
+    """Stream every upload to a temporary file, whatever its size.
+
+    Nothing is buffered in memory beyond one chunk. Bytes past
+    ``FILE_UPLOAD_MAX_SIZE`` are dropped; the file keeps its full ``size``
+    so forms can reject it. Size, time and peak RSS growth are logged for
+    each upload.
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+        self.started = time.perf_counter()
+        self.rss = _max_rss()
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > settings.FILE_UPLOAD_MAX_SIZE:
+            return None
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        upload = super().file_complete(file_size)
+        logger.info(
+            'Upload %s: %d bytes in %.3fs, peak RSS +%d KiB',
+            self.file_name, file_size, time.perf_counter() - self.started,
+            _max_rss() - self.rss)
+        return upload
@@ -0,0 +1,42 @@
+"""Helpers for commands that write rows in bulk, bypassing signals."""
+import itertools
+from contextlib import contextmanager
+
+from django.db import transaction
+
+
+@contextmanager
+def explicit_dates(model, *names):
+    """Let bulk_create keep the values of ``auto_now_add`` fields."""
+    fields = [model._meta.get_field(name) for name in names]
+    previous = [field.auto_now_add for field in fields]
+    try:
+        for field in fields:
+            field.auto_now_add = False
+        yield
+    finally:
+        for field, value in zip(fields, previous):
+            field.auto_now_add = value
+
+
+def batches(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def insert(model, objects, batch_size, new_only=None):
+    """bulk_create ``objects`` one transaction per batch; yield batch sizes.
+
+    ``new_only``, if given, is called with each batch inside its
+    transaction and returns the rows to write.
+    """
+    for batch in batches(objects, batch_size):
+        with transaction.atomic():
+            if new_only is not None:
+                batch = new_only(batch)
+            model.objects.bulk_create(batch)
+        yield len(batch)
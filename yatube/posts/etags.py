@@ -0,0 +1,51 @@
+"""ETags of post pages, computed without rendering them.
+
+Feeds are tagged by version counters from ``core.caching``, which signals
+bump whenever a post, comment, group or follow changes, so revalidating a
+feed costs no query. A post page is tagged by the post's ``version``
+column. Every tag includes the viewer, since pages render the nav bar and
+edit buttons per user.
+"""
+from core import caching
+from core.parallel import gather
+
+from .models import Post
+
+POSTS = 'pages:posts'
+FOLLOWS = 'pages:follows'
+
+
+def posts_changed():
+    caching.invalidate(POSTS)
+
+
+def follows_changed():
+    caching.invalidate(FOLLOWS)
+
+
+def _tag(request, *parts):
+    return '-'.join(str(part) for part in (request.user.pk or 0, *parts))
+
+
+def index(request):
+    return _tag(request, caching.version(POSTS))
+
+
+def group_posts(request, slug):
+    return _tag(request, caching.version(POSTS))
+
+
+def profile(request, username):
+    return _tag(
+        request, caching.version(POSTS), caching.version(FOLLOWS))
+
+
+def post_detail(request, username, post_id):
+    # The viewer's session and user load while the version is read.
+    _, version = gather(
+        lambda: request.user.pk,
+        lambda: Post.objects.filter(pk=post_id).values_list(
+            'version', flat=True).first())
+    if version is None:
+        return None
+    return _tag(request, post_id, version)
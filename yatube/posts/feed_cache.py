@@ -0,0 +1,94 @@
+"""Cache of feed pages.
+
+Only the ids of a page (plus what is needed to rebuild its links) are
+cached, under a key that includes the feed version (see ``core.caching``),
+so bumping the version drops every cached page of that feed at once, in
+every process. A page past its freshness deadline is recomputed by one
+worker while the others keep serving the stale copy.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from core import caching, parallel
+
+LOCK_TIMEOUT = 10
+LOCK_WAIT = 0.05
+LOCK_RETRIES = 20
+
+
+def _namespace(feed):
+    return f'feed:{feed}'
+
+
+def invalidate(feed):
+    caching.invalidate(_namespace(feed))
+
+
+def _page_key(feed, number, cursor):
+    raw = f'{number}:{cursor or ""}'.encode()
+    digest = hashlib.md5(raw).hexdigest()
+    return caching.make_key(_namespace(feed), digest)
+
+
+def _compute(paginator, number, cursor):
+    page, _ = parallel.gather(
+        lambda: paginator.get_page(number, cursor), lambda: paginator.count)
+    data = {
+        'ids': [post.pk for post in page],
+        'number': page.number,
+        'has_next': page.next_cursor is not None,
+        'has_previous': page.previous_cursor is not None,
+        'count': paginator.count,
+        'is_approximate': paginator.is_approximate,
+    }
+    return page, data
+
+
+def _restore(paginator, data):
+    paginator.count = data['count']
+    paginator.is_approximate = data['is_approximate']
+    posts = paginator.object_list.in_bulk(data['ids'])
+    items = [posts[pk] for pk in data['ids'] if pk in posts]
+    return paginator.build_page(
+        items, data['number'], data['has_next'], data['has_previous'])
+
+
+def get_page(feed, paginator, number=None, cursor=None, replica=False):
+    """Page of ``paginator``, from the cache when there is a fresh copy.
+
+    A page read from a replica may lag behind the feed version, so it is
+    kept (fresh or stale) for ``REPLICA_PIN_SECONDS`` at most; writers
+    pinned to the primary should not read this cache at all.
+    """
+    timeout = settings.FEED_CACHE_TIMEOUT
+    lifetime = timeout * 2
+    if replica:
+        lifetime = min(lifetime, settings.REPLICA_PIN_SECONDS)
+        timeout = min(timeout, lifetime)
+    key = _page_key(feed, number, cursor)
+    lock = f'{key}:lock'
+    cached = cache.get(key)
+    if cached is not None and cached['fresh_until'] > time.time():
+        return _restore(paginator, cached['data'])
+
+    for _ in range(LOCK_RETRIES):
+        if cache.add(lock, 1, timeout=LOCK_TIMEOUT):
+            try:
+                page, data = _compute(paginator, number, cursor)
+                cache.set(key, {
+                    'data': data,
+                    'fresh_until': time.time() + timeout,
+                }, timeout=lifetime)
+            finally:
+                cache.delete(lock)
+            return page
+        if cached is not None:
+            return _restore(paginator, cached['data'])
+        time.sleep(LOCK_WAIT)
+        cached = cache.get(key)
+        if cached is not None:
+            return _restore(paginator, cached['data'])
+    return paginator.get_page(number, cursor)
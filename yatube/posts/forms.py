@@ -1,4 +1,6 @@
 from django import forms
+from django.conf import settings
+from django.template.defaultfilters import filesizeformat
 
 from .models import Comment, Post
 
@@ -8,6 +10,33 @@ class PostForm(forms.ModelForm):
         model = Post
         fields = ('text', 'group', 'image')
 
+    def clean(self):
+        cleaned_data = super().clean()
+        upload = self.files.get('image')
+        limit = settings.FILE_UPLOAD_MAX_SIZE
+        if upload is not None and upload.size > limit:
+            # The stored part of the file is cut off, so ImageField has
+            # already called it broken; report the real reason instead.
+            self.errors.pop('image', None)
+            self.add_error('image', forms.ValidationError(
+                'Файл больше %(limit)s.',
+                code='file_too_large',
+                params={'limit': filesizeformat(limit)}))
+        return cleaned_data
+
+    def clean_image(self):
+        image = self.cleaned_data.get('image')
+        # Set by ImageField from the file header, pixels are not decoded.
+        header = getattr(image, 'image', None)
+        if header is not None:
+            width, height = header.size
+            if width * height > settings.POST_IMAGE_MAX_PIXELS:
+                raise forms.ValidationError(
+                    'Слишком большое изображение: %(width)s×%(height)s.',
+                    code='too_many_pixels',
+                    params={'width': width, 'height': height})
+        return image
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
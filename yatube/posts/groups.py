@@ -0,0 +1,32 @@
+"""Groups by slug, cached as one map for every process.
+
+There are few groups and they rarely change, so the whole table is cached
+under a namespace version (see ``core.caching``). Signals call ``changed``
+when a group is saved or deleted and when its post counter moves; group
+pages then read the group and its post count without a query. The map
+outlives the request, so it is always read from the primary: a lagging
+replica would cache stale groups under the new version.
+"""
+from core import caching
+from core.db.replicas import replica_reads
+
+from .models import Group
+
+NAMESPACE = 'groups'
+
+
+def _load():
+    with replica_reads(None):
+        return {group.slug: group for group in Group.objects.all()}
+
+
+def by_slug():
+    return caching.get_or_set(NAMESPACE, 'by_slug', _load)
+
+
+def get(slug):
+    return by_slug().get(slug)
+
+
+def changed():
+    caching.invalidate(NAMESPACE)
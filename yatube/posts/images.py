@@ -0,0 +1,69 @@
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+FORMATS = (('jpeg', 'JPEG', 'jpg'), ('webp', 'WEBP', 'webp'))
+
+
+def _save(image, name, format):
+    buffer = BytesIO()
+    image.save(buffer, format, quality=settings.POST_IMAGE_QUALITY)
+    return default_storage.save(name, ContentFile(buffer.getvalue()))
+
+
+def _open(field_file, size):
+    """Decode an image at no more than about ``size`` pixels.
+
+    For JPEG, ``draft`` makes the decoder scale down by 1/2..1/8 while
+    reading, so a huge photo never exists in memory at full resolution.
+    """
+    with field_file.open('rb'):
+        image = Image.open(field_file)
+        image.draft('RGB', size)
+        image = ImageOps.exif_transpose(image)
+        return image.convert('RGB')
+
+
+def shrink_original(field_file):
+    """Save an oversized original scaled down; return the name to use.
+
+    The copy keeps the source format (and so transparency); animated
+    images are left alone. The original is not deleted here: the caller
+    removes whichever of the two files the post ends up not using.
+    """
+    side = settings.POST_IMAGE_MAX_SIDE
+    with field_file.open('rb'):
+        image = Image.open(field_file)
+        format = image.format
+        if (max(image.size) <= side
+                or getattr(image, 'is_animated', False)):
+            return field_file.name
+        image.draft(image.mode, (side, side))
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((side, side), Image.LANCZOS)
+    return _save(image, field_file.name, format)
+
+
+def render_variants(field_file, prefix):
+    """Cut every POST_IMAGE_SIZES variant (center crop) as JPEG and WebP."""
+    image = _open(field_file, settings.POST_IMAGE_SIZES[0])
+    stem = os.path.splitext(os.path.basename(field_file.name))[0]
+    variants = []
+    for width, height in settings.POST_IMAGE_SIZES:
+        fitted = ImageOps.fit(image, (width, height), Image.LANCZOS)
+        variant = {'width': width, 'height': height}
+        for key, format, extension in FORMATS:
+            name = f'posts/thumbs/{prefix}-{stem}-{width}x{height}.{extension}'
+            variant[key] = _save(fitted, name, format)
+        variants.append(variant)
+    return variants
+
+
+def delete_variants(variants):
+    for variant in variants:
+        for key, _, _ in FORMATS:
+            default_storage.delete(variant[key])
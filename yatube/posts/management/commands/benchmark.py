@@ -0,0 +1,134 @@
+import json
+import random
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Max, Min
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.benchmark import Recorder, format_report
+from core.db import pool
+from posts.models import Follow, Group, Post
+
+User = get_user_model()
+
+DEFAULT_MIX = 'index=40,group_list=15,profile=20,post_detail=20,follow_index=5'
+
+
+class Command(BaseCommand):
+    help = (
+        'Replay a weighted mix of feed requests in-process and report '
+        'p50/p95/p99 latency and queries per request for each view.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=1000)
+        parser.add_argument('--warmup', type=int, default=50)
+        parser.add_argument(
+            '--mix', default=DEFAULT_MIX,
+            help='Comma separated view=weight pairs.')
+        parser.add_argument(
+            '--max-page', type=int, default=5,
+            help='Feeds are requested at a random page up to this one.')
+        parser.add_argument(
+            '--cold', action='store_true',
+            help='Clear the cache before every request.')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--json', action='store_true')
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options['seed'])
+        self.max_page = options['max_page']
+        mix = self.parse_mix(options['mix'])
+        self.load_targets()
+
+        client = Client()
+        follower = Follow.objects.values_list('user', flat=True).first()
+        if follower is not None:
+            client.force_login(User.objects.get(pk=follower))
+        elif mix.pop('follow_index', None):
+            self.stderr.write('No follows, follow_index is left out.')
+
+        views, weights = zip(*mix.items())
+        recorder = Recorder()
+        total = options['warmup'] + options['requests']
+        for number in range(total):
+            view = self.random.choices(views, weights)[0]
+            url = getattr(self, f'url_{view}')()
+            if options['cold']:
+                cache.clear()
+            with CaptureQueriesContext(connection) as queries:
+                elapsed = self.timed_get(client, url)
+            if number >= options['warmup']:
+                recorder.add(view, elapsed, queries=len(queries))
+
+        report = recorder.report()
+        if options['json']:
+            report['db_pools'] = pool.stats()
+            self.stdout.write(json.dumps(report, indent=2))
+        else:
+            self.stdout.write(format_report(report))
+            for alias, stats in pool.stats().items():
+                self.stdout.write(f'db pool {alias}: ' + ', '.join(
+                    f'{key}={value:.4g}' if isinstance(value, float)
+                    else f'{key}={value}' for key, value in stats.items()))
+
+    def timed_get(self, client, url):
+        start = time.perf_counter()
+        response = client.get(url)
+        elapsed = time.perf_counter() - start
+        if response.status_code != 200:
+            raise CommandError(f'{url} answered {response.status_code}')
+        return elapsed
+
+    def parse_mix(self, raw):
+        mix = {}
+        for part in raw.split(','):
+            view, _, weight = part.partition('=')
+            if not hasattr(self, f'url_{view.strip()}'):
+                raise CommandError(f'Unknown view in --mix: {view}')
+            mix[view.strip()] = float(weight or 1)
+        return mix
+
+    def load_targets(self):
+        bounds = Post.objects.aggregate(low=Min('pk'), high=Max('pk'))
+        if bounds['low'] is None:
+            raise CommandError('No posts; run generate_data first.')
+        self.low, self.high = bounds['low'], bounds['high']
+        self.slugs = list(Group.objects.values_list('slug', flat=True))
+
+    def random_post(self):
+        pk = self.random.randint(self.low, self.high)
+        post = Post.objects.select_related('author').filter(
+            pk__gte=pk).order_by('pk').first()
+        return post or Post.objects.select_related('author').get(
+            pk=self.low)
+
+    def page(self):
+        return f'?page={self.random.randint(1, self.max_page)}'
+
+    def url_index(self):
+        return reverse('post:index') + self.page()
+
+    def url_group_list(self):
+        if not self.slugs:
+            return self.url_index()
+        slug = self.random.choice(self.slugs)
+        return reverse('post:group_list', kwargs={'slug': slug}) + self.page()
+
+    def url_profile(self):
+        username = self.random_post().author.username
+        return reverse(
+            'post:profile', kwargs={'username': username}) + self.page()
+
+    def url_post_detail(self):
+        post = self.random_post()
+        return reverse('post:post_detail', kwargs={
+            'username': post.author.username, 'post_id': post.pk})
+
+    def url_follow_index(self):
+        return reverse('post:follow_index') + self.page()
@@ -0,0 +1,184 @@
+import asyncio
+import io
+import json
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from importlib import import_module
+from unittest import mock
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.contrib.auth import (BACKEND_SESSION_KEY, HASH_SESSION_KEY,
+                                 SESSION_KEY)
+from django.core.management.base import BaseCommand, CommandError
+from django.core.wsgi import get_wsgi_application
+from django.db.backends import utils
+from django.db.models import Max, Min
+from django.test.utils import override_settings
+from django.utils.crypto import get_random_string
+
+from core.asgi import WsgiToAsgi
+from core.benchmark import Recorder, format_report
+from posts.models import Post, User
+
+BACKEND = 'django.contrib.auth.backends.ModelBackend'
+
+
+class Command(BaseCommand):
+    help = (
+        'Keep --concurrency requests in flight and report throughput and '
+        'latency: WSGI on as many threads, then the ASGI entry point with '
+        'and without parallel queries. The mix is anonymous post pages and '
+        'feeds plus logged-in follows, unfollows and comments; --latency '
+        'adds a database round trip to every query.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=64)
+        parser.add_argument('--requests', type=int, default=1000)
+        parser.add_argument('--threads', type=int, default=8,
+                            help='ASGI_THREADS for the ASGI runs.')
+        parser.add_argument(
+            '--latency', type=float, default=0.0,
+            help='Milliseconds added to every query, as a networked '
+                 'database would.')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--json', action='store_true')
+
+    def handle(self, *args, **options):
+        posts = list(Post.objects.select_related('author').filter(
+            pk__in=self.sample_ids(200)))
+        if not posts:
+            raise CommandError('No posts; run generate_data first.')
+        rng = random.Random(options['seed'])
+        sessions = [
+            self.login(user) for user in User.objects.order_by('?')[:50]]
+        requests = [
+            self.make_request(rng, post, sessions)
+            for post in rng.choices(posts, k=options['requests'])]
+        wsgi = get_wsgi_application()
+
+        recorder = Recorder()
+        rates = {}
+        with self.latency(options['latency'] / 1000):
+            with override_settings(PARALLEL_QUERY_WORKERS=0):
+                rates['wsgi'] = self.run_wsgi(
+                    recorder, wsgi, requests, options['concurrency'])
+            for label, workers in (('asgi', 0), ('asgi+parallel', None)):
+                overrides = {} if workers is None else {
+                    'PARALLEL_QUERY_WORKERS': workers}
+                with override_settings(**overrides):
+                    application = WsgiToAsgi(wsgi, options['threads'])
+                    rates[label] = asyncio.run(self.run_asgi(
+                        recorder, label, application, requests,
+                        options['concurrency']))
+                    application.executor.shutdown()
+
+        report = recorder.report()
+        del report['total']
+        for label, rate in rates.items():
+            report[label]['per_second'] = rate
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+        else:
+            self.stdout.write(format_report(report))
+
+    def sample_ids(self, size):
+        bounds = Post.objects.aggregate(low=Min('pk'), high=Max('pk'))
+        if bounds['low'] is None:
+            return []
+        return random.sample(
+            range(bounds['low'], bounds['high'] + 1),
+            min(size, bounds['high'] - bounds['low'] + 1))
+
+    def login(self, user):
+        """Cookie header of a fresh session of ``user`` with a CSRF token."""
+        session = import_module(settings.SESSION_ENGINE).SessionStore()
+        session[SESSION_KEY] = str(user.pk)
+        session[BACKEND_SESSION_KEY] = BACKEND
+        session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+        session.create()
+        token = get_random_string(64)
+        cookie = f'sessionid={session.session_key}; csrftoken={token}'
+        return [(b'cookie', cookie.encode()), (b'x-csrftoken', token.encode())]
+
+    def make_request(self, rng, post, sessions):
+        """Method, path, headers and body of one request of the mix."""
+        post_path = f'/{post.author.username}/{post.pk}/'
+        kind = rng.random()
+        if kind < 0.5:
+            return 'GET', post_path, [], b''
+        if kind < 0.7:
+            return 'GET', '/', [], b''
+        headers = rng.choice(sessions)
+        if kind < 0.9:
+            action = rng.choice(('follow', 'unfollow'))
+            return 'GET', f'/{post.author.username}/{action}/', headers, b''
+        body = urlencode({'text': get_random_string(40)}).encode()
+        headers = headers + [
+            (b'content-type', b'application/x-www-form-urlencoded')]
+        return 'POST', post_path + 'comment/', headers, body
+
+    def latency(self, seconds):
+        """Sleep ``seconds`` before every query, in the querying thread."""
+        execute = utils.CursorWrapper._execute
+
+        def slow_execute(cursor, *args, **kwargs):
+            time.sleep(seconds)
+            return execute(cursor, *args, **kwargs)
+
+        if not seconds:
+            return nullcontext()
+        return mock.patch.object(
+            utils.CursorWrapper, '_execute', slow_execute)
+
+    def run_wsgi(self, recorder, wsgi, requests, concurrency):
+        application = WsgiToAsgi(wsgi, concurrency)
+
+        def send(request):
+            method, path, headers, body = request
+            body = io.BytesIO(body)
+            body.seek(0, io.SEEK_END)
+            start = time.perf_counter()
+            application.run(application.environ(
+                self.scope(method, path, headers), body))
+            recorder.add('wsgi', time.perf_counter() - start)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(concurrency) as executor:
+            list(executor.map(send, requests))
+        application.executor.shutdown()
+        return len(requests) / (time.perf_counter() - start)
+
+    async def run_asgi(self, recorder, label, application, requests,
+                       concurrency):
+        queue = list(reversed(requests))
+
+        async def send(message):
+            pass
+
+        async def client():
+            while queue:
+                method, path, headers, body = queue.pop()
+
+                async def receive():
+                    return {'type': 'http.request', 'body': body}
+
+                start = time.perf_counter()
+                await application(
+                    self.scope(method, path, headers), receive, send)
+                recorder.add(label, time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(concurrency)))
+        return len(requests) / (time.perf_counter() - start)
+
+    def scope(self, method, path, headers=()):
+        return {
+            'type': 'http',
+            'method': method,
+            'path': path,
+            'query_string': b'',
+            'headers': [(b'host', b'localhost'), *headers],
+        }
@@ -0,0 +1,53 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from core.benchmark import Recorder, format_report
+from core.paginator import KeysetPaginator
+from posts.models import Post
+
+TEMPLATE = 'posts/includes/paginator.html'
+
+
+class Command(BaseCommand):
+    help = (
+        'Render the page navigation of feeds with growing numbers of pages '
+        'and report p50/p95/p99 render time and links per render. The '
+        'total is given to the paginator, so no posts are needed.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--pages', default='10,1000,100000,10000000',
+            help='Comma separated totals of pages.')
+        parser.add_argument('--renders', type=int, default=1000)
+        parser.add_argument('--warmup', type=int, default=50)
+        parser.add_argument('--json', action='store_true')
+
+    def handle(self, *args, **options):
+        recorder = Recorder()
+        # Any unsaved post gives the page cursors to render.
+        items = [Post(pk=1, pub_date=timezone.now())]
+        for pages in map(int, options['pages'].split(',')):
+            paginator = KeysetPaginator(
+                Post.objects.none(), 1, count=pages)
+            total = options['warmup'] + options['renders']
+            for number in range(total):
+                current = number % pages + 1
+                page = paginator.build_page(
+                    items, current, current < pages, current > 1)
+                start = time.perf_counter()
+                html = render_to_string(TEMPLATE, {'page': page})
+                elapsed = time.perf_counter() - start
+                if number >= options['warmup']:
+                    recorder.add(
+                        f'{pages} pages', elapsed,
+                        links=html.count('page-item'))
+
+        report = recorder.report()
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+        else:
+            self.stdout.write(format_report(report))
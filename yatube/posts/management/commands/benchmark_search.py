@@ -0,0 +1,63 @@
+import json
+import random
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max, Min
+
+from core.benchmark import Recorder, format_report
+from posts.models import Post
+from posts.search import search
+from posts.stemmer import WORD_RE
+
+
+class Command(BaseCommand):
+    help = (
+        'Run full-text queries built from words of random posts and report '
+        'p50/p95/p99 latency of the first and the following result pages.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--queries', type=int, default=500)
+        parser.add_argument('--warmup', type=int, default=20)
+        parser.add_argument(
+            '--words', type=int, default=2,
+            help='Words per query, taken from one post.')
+        parser.add_argument(
+            '--pages', type=int, default=3,
+            help='Result pages followed per query.')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--json', action='store_true')
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options['seed'])
+        bounds = Post.objects.aggregate(low=Min('pk'), high=Max('pk'))
+        if bounds['low'] is None:
+            raise CommandError('No posts; run generate_data first.')
+        self.low, self.high = bounds['low'], bounds['high']
+
+        recorder = Recorder()
+        total = options['warmup'] + options['queries']
+        for number in range(total):
+            query = self.random_query(options['words'])
+            cursor = None
+            for page in range(options['pages']):
+                label = 'first_page' if page == 0 else 'next_page'
+                if number < options['warmup']:
+                    posts, cursor = search(query, cursor)
+                else:
+                    posts, cursor = recorder.time(
+                        label, lambda: search(query, cursor))
+                if cursor is None:
+                    break
+
+        report = recorder.report()
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+        else:
+            self.stdout.write(format_report(report))
+
+    def random_query(self, size):
+        pk = self.random.randint(self.low, self.high)
+        text = Post.objects.filter(pk__gte=pk).order_by('pk').values_list(
+            'text', flat=True).first() or ''
+        words = WORD_RE.findall(text) or ['post']
+        return ' '.join(self.random.sample(words, min(size, len(words))))
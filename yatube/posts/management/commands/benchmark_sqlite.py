@@ -0,0 +1,123 @@
+import json
+import threading
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connections
+
+from core.benchmark import Recorder, format_report
+from core.db import pool
+from posts.models import Comment, Post
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Read feed pages from several threads while others add comments, '
+        'and report read and write latency and throughput. --pragma '
+        'overrides the connection PRAGMAS, e.g. --pragma journal_mode=delete '
+        'to compare with the rollback journal.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=8)
+        parser.add_argument('--writers', type=int, default=2)
+        parser.add_argument(
+            '--seconds', type=float, default=10,
+            help='How long the threads run.')
+        parser.add_argument(
+            '--pragma', action='append', default=[],
+            metavar='NAME=VALUE')
+        parser.add_argument('--json', action='store_true')
+
+    def handle(self, *args, **options):
+        if connections['default'].vendor != 'sqlite':
+            raise CommandError('This benchmark is for SQLite.')
+        self.apply_pragmas(options['pragma'])
+        self.posts = list(Post.objects.order_by('-pk').values_list(
+            'pk', flat=True)[:100])
+        self.author = User.objects.order_by('pk').first()
+        if not self.posts:
+            raise CommandError('No posts; run generate_data first.')
+        connections.close_all()
+
+        self.recorder = Recorder()
+        self.lock = threading.Lock()
+        self.errors = 0
+        self.deadline = time.monotonic() + options['seconds']
+        threads = [
+            threading.Thread(target=self.run, args=(self.read,))
+            for _ in range(options['readers'])]
+        threads += [
+            threading.Thread(target=self.run, args=(self.write,))
+            for _ in range(options['writers'])]
+        start = time.monotonic()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.monotonic() - start
+        self.cleanup()
+
+        report = self.recorder.report()
+        for label in ('read', 'write'):
+            if label in report:
+                report[label]['per_second'] = (
+                    report[label]['requests'] / elapsed)
+        report['total']['errors'] = self.errors
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+        else:
+            self.stdout.write(format_report(report))
+
+    def apply_pragmas(self, pairs):
+        pragmas = dict(connections.databases['default'].get('PRAGMAS', {}))
+        for pair in pairs:
+            name, _, value = pair.partition('=')
+            pragmas[name] = value
+        # Wrappers of every thread share this dict; drop pooled
+        # connections opened with the old pragmas.
+        connections.databases['default']['PRAGMAS'] = pragmas
+        connections.close_all()
+        pool.close_all()
+        self.stderr.write('PRAGMAS: ' + ', '.join(
+            f'{name}={value}' for name, value in pragmas.items()))
+
+    def run(self, action):
+        number = 0
+        try:
+            while time.monotonic() < self.deadline:
+                number += 1
+                start = time.perf_counter()
+                try:
+                    label = action(number)
+                except OperationalError:
+                    with self.lock:
+                        self.errors += 1
+                    continue
+                with self.lock:
+                    self.recorder.add(label, time.perf_counter() - start)
+                if connections['default'].pool is not None:
+                    # Like the end of a request: back to the pool.
+                    connections['default'].close()
+        finally:
+            connections.close_all()
+
+    def read(self, number):
+        post = self.posts[number % len(self.posts)]
+        list(Post.objects.select_related('author', 'group').order_by(
+            '-pub_date', '-pk')[:10])
+        list(Comment.objects.filter(post_id=post).select_related(
+            'author').order_by('-created', '-pk')[:20])
+        return 'read'
+
+    def write(self, number):
+        Comment.objects.create(
+            post_id=self.posts[number % len(self.posts)],
+            author=self.author,
+            text='benchmark_sqlite')
+        return 'write'
+
+    def cleanup(self):
+        Comment.objects.filter(text='benchmark_sqlite').delete()
@@ -0,0 +1,44 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.transfer import (FORMATS, KINDS, export_rows, guess_format,
+                            write_rows)
+
+
+class Command(BaseCommand):
+    help = (
+        'Stream posts, comments or follows to an NDJSON or CSV file in '
+        'constant memory. Users are written as usernames, groups as slugs.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--kind', choices=sorted(KINDS), default='posts')
+        parser.add_argument(
+            '--output', default='-', help='File path, "-" for stdout.')
+        parser.add_argument(
+            '--format', choices=FORMATS,
+            help='Guessed from the file extension, NDJSON by default.')
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        kind, path = options['kind'], options['output']
+        format = options['format'] or guess_format(path)
+        report = self.stderr if path == '-' else self.stdout
+        rows = export_rows(kind, options['batch_size'])
+
+        start = time.perf_counter()
+        total = 0
+        stream = sys.stdout if path == '-' else open(
+            path, 'w', encoding='utf-8', newline='')
+        try:
+            for _ in write_rows(stream, format, kind, rows):
+                total += 1
+        finally:
+            if stream is not sys.stdout:
+                stream.close()
+        elapsed = time.perf_counter() - start
+        report.write(
+            f'Exported {total} {kind} in {elapsed:.1f}s '
+            f'({total / max(elapsed, 1e-9):.0f} rows/s).')
@@ -0,0 +1,166 @@
+import bisect
+import itertools
+import random
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db.models import Max
+from django.utils import timezone
+
+from posts import timeline
+from posts.bulk import explicit_dates, insert
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Fill the database with a synthetic dataset: users, groups, posts '
+        'and comments with power-law authorship and a power-law follow '
+        'graph. Rows are written with bulk_create, signals do not fire; '
+        'counters, stats, the search index and timelines are rebuilt '
+        'at the end.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100000)
+        parser.add_argument('--groups', type=int, default=50)
+        parser.add_argument('--posts', type=int, default=5000000)
+        parser.add_argument('--comments', type=int, default=20000000)
+        parser.add_argument(
+            '--follows', type=int, default=20,
+            help='Average number of authors a user follows.')
+        parser.add_argument(
+            '--alpha', type=float, default=1.1,
+            help='Exponent of the popularity power law.')
+        parser.add_argument('--days', type=int, default=365)
+        parser.add_argument('--batch-size', type=int, default=10000)
+        parser.add_argument('--prefix', default='bench')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--no-timelines', action='store_true')
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.alpha = options['alpha']
+
+        users = self.step('users', self.create_users, options)
+        groups = self.step('groups', self.create_groups, options)
+        posts = self.step('posts', self.create_posts, options, users, groups)
+        self.step('comments', self.create_comments, options, users, posts)
+        self.step('follows', self.create_follows, options, users)
+        self.step('comment counts', self.command, 'rebuild_comment_counts')
+        self.step('author stats', self.command, 'reconcile_author_stats')
+        self.step('group counts', self.command, 'rebuild_group_counts')
+        self.step('search index', self.command, 'rebuild_search_index')
+        if not options['no_timelines']:
+            self.step('timelines', timeline.backfill_all)
+
+    def step(self, name, func, *args):
+        start = time.perf_counter()
+        result = func(*args)
+        self.stdout.write(f'{name}: {time.perf_counter() - start:.1f}s')
+        return result
+
+    def command(self, name):
+        call_command(name, stdout=self.stdout, stderr=self.stderr)
+
+    def bulk(self, model, objects):
+        for _ in insert(model, objects, self.batch_size):
+            pass
+
+    def new_ids(self, model, create):
+        before = model.objects.aggregate(top=Max('pk'))['top'] or 0
+        create()
+        after = model.objects.aggregate(top=Max('pk'))['top'] or 0
+        return range(before + 1, after + 1)
+
+    def popularity(self, size):
+        """Cumulative Zipf weights for weighted sampling by rank."""
+        weights = (1 / (rank ** self.alpha) for rank in range(1, size + 1))
+        return list(itertools.accumulate(weights))
+
+    def pick(self, population, cumulative):
+        point = self.random.random() * cumulative[-1]
+        return population[bisect.bisect(cumulative, point)]
+
+    def create_users(self, options):
+        password = make_password(None)
+        prefix = options['prefix']
+        offset = User.objects.filter(username__startswith=prefix).count()
+        self.bulk(User, (
+            User(username=f'{prefix}{offset + i}', password=password)
+            for i in range(options['users'])))
+        return list(User.objects.filter(
+            username__startswith=prefix).values_list('pk', flat=True))
+
+    def create_groups(self, options):
+        prefix = options['prefix']
+        offset = Group.objects.filter(slug__startswith=prefix).count()
+        self.bulk(Group, (
+            Group(
+                title=f'Group {offset + i}',
+                slug=f'{prefix}-{offset + i}',
+                description='Generated group')
+            for i in range(options['groups'])))
+        return list(Group.objects.filter(
+            slug__startswith=prefix).values_list('pk', flat=True))
+
+    def create_posts(self, options, users, groups):
+        total = options['posts']
+        authors = self.popularity(len(users))
+        start = timezone.now() - timedelta(days=options['days'])
+        step = timedelta(days=options['days']) / max(total, 1)
+
+        def posts():
+            for i in range(total):
+                group = self.random.choice(groups) if (
+                    groups and self.random.random() < 0.7) else None
+                yield Post(
+                    text=f'Generated post {i} ' * self.random.randint(1, 20),
+                    pub_date=start + step * i,
+                    author_id=self.pick(users, authors),
+                    group_id=group)
+
+        with explicit_dates(Post, 'pub_date'):
+            return self.new_ids(Post, lambda: self.bulk(Post, posts()))
+
+    def create_comments(self, options, users, posts):
+        if not posts:
+            return
+
+        def comments():
+            for i in range(options['comments']):
+                # Newer posts get most of the comments.
+                index = int(len(posts) * (1 - self.random.random() ** 3))
+                yield Comment(
+                    text=f'Generated comment {i}',
+                    post_id=posts[min(index, len(posts) - 1)],
+                    author_id=self.random.choice(users))
+
+        self.bulk(Comment, comments())
+
+    def create_follows(self, options, users):
+        authors = self.popularity(len(users))
+        mean = options['follows']
+
+        def follows():
+            for user_id in users:
+                wanted = min(
+                    int(self.random.paretovariate(2) * mean / 2),
+                    len(users) - 1)
+                followed = set()
+                for _ in range(wanted * 2):
+                    if len(followed) >= wanted:
+                        break
+                    author_id = self.pick(users, authors)
+                    if author_id != user_id:
+                        followed.add(author_id)
+                for author_id in followed:
+                    yield Follow(user_id=user_id, author_id=author_id)
+
+        self.bulk(Follow, follows())
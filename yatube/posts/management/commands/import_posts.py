@@ -0,0 +1,219 @@
+import sys
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import IntegrityError, connection
+
+from posts import feed_cache, timeline
+from posts.bulk import explicit_dates, insert
+from posts.models import Comment, Follow, Group, Post
+from posts.transfer import (FORMATS, KINDS, guess_format, parse_date,
+                            parse_id, read_rows)
+
+User = get_user_model()
+
+DATE_FIELDS = {'posts': ['pub_date'], 'comments': ['created'], 'follows': []}
+REBUILD = {
+    'posts': [
+        'reconcile_author_stats', 'rebuild_group_counts',
+        'rebuild_search_index'],
+    'comments': ['rebuild_comment_counts'],
+    'follows': ['reconcile_author_stats'],
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Load posts, comments or follows from an NDJSON or CSV file made by '
+        'export_posts. Rows are streamed and written with bulk_create, one '
+        'transaction per batch; rows that were imported before are skipped, '
+        'and the import stops at a post or comment id that is taken by '
+        'another row. Counters, the search index and timelines are rebuilt '
+        'at the end.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='File path, "-" for stdin.')
+        parser.add_argument(
+            '--kind', choices=sorted(KINDS), default='posts')
+        parser.add_argument(
+            '--format', choices=FORMATS,
+            help='Guessed from the file extension, NDJSON by default.')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument(
+            '--create-missing', action='store_true',
+            help='Create unknown users and groups instead of skipping rows.')
+        parser.add_argument(
+            '--no-rebuild', action='store_true',
+            help='Leave counters, search index and timelines as they are.')
+
+    def handle(self, *args, **options):
+        kind, path = options['kind'], options['path']
+        format = options['format'] or guess_format(path)
+        model = KINDS[kind][0]
+        self.create_missing = options['create_missing']
+        self.skipped = 0
+        self.users = dict(User.objects.values_list('username', 'pk'))
+        self.groups = dict(Group.objects.values_list('slug', 'pk'))
+        build = getattr(self, f'build_{kind}')
+
+        start = time.perf_counter()
+        total = 0
+        stream = sys.stdin if path == '-' else open(
+            path, encoding='utf-8', newline='')
+        try:
+            objects = (
+                obj for obj in map(build, read_rows(stream, format))
+                if obj is not None)
+            with explicit_dates(model, *DATE_FIELDS[kind]):
+                for size in insert(
+                        model, objects, options['batch_size'],
+                        getattr(self, f'new_{kind}')):
+                    total += size
+                    self.progress(total, start)
+        except IntegrityError as error:
+            raise CommandError(
+                f'Batch after row {total} was rejected: {error}')
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+        self.reset_sequences(model)
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            f'Imported {total} {kind} in {elapsed:.1f}s '
+            f'({total / max(elapsed, 1e-9):.0f} rows/s), '
+            f'skipped {self.skipped}.')
+
+        if not options['no_rebuild']:
+            self.rebuild(kind)
+
+    def progress(self, total, start):
+        elapsed = time.perf_counter() - start
+        self.stderr.write(
+            f'{total} rows, {total / max(elapsed, 1e-9):.0f} rows/s',
+            ending='\r')
+
+    def reset_sequences(self, model):
+        statements = connection.ops.sequence_reset_sql(no_style(), [model])
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+
+    def rebuild(self, kind):
+        for command in REBUILD[kind]:
+            call_command(command, stdout=self.stdout)
+        if kind in ('posts', 'follows'):
+            timeline.backfill_all()
+        feed_cache.invalidate('index')
+
+    def user_id(self, username):
+        if username in self.users or not username:
+            return self.users.get(username)
+        if not self.create_missing:
+            return None
+        user = User(username=username)
+        user.set_unusable_password()
+        user.save()
+        self.users[username] = user.pk
+        return user.pk
+
+    def group_id(self, slug):
+        if slug in self.groups or not slug:
+            return self.groups.get(slug)
+        if not self.create_missing:
+            return None
+        group = Group.objects.create(title=slug, slug=slug, description='')
+        self.groups[slug] = group.pk
+        return group.pk
+
+    def skip(self):
+        self.skipped += 1
+
+    def build_posts(self, row):
+        author_id = self.user_id(row['author'])
+        group_id = self.group_id(row.get('group'))
+        if author_id is None or (row.get('group') and group_id is None):
+            return self.skip()
+        try:
+            pk = parse_id(row.get('id'))
+            pub_date = parse_date(row.get('pub_date'))
+        except ValueError:
+            return self.skip()
+        return Post(
+            id=pk,
+            author_id=author_id,
+            group_id=group_id,
+            text=row.get('text') or '',
+            pub_date=pub_date,
+            image=row.get('image') or None)
+
+    def build_comments(self, row):
+        author_id = self.user_id(row['author'])
+        try:
+            pk = parse_id(row.get('id'))
+            post_id = parse_id(row.get('post'))
+            created = parse_date(row.get('created'))
+        except ValueError:
+            return self.skip()
+        if author_id is None or post_id is None:
+            return self.skip()
+        return Comment(
+            id=pk,
+            post_id=post_id,
+            author_id=author_id,
+            text=row.get('text') or '',
+            created=created)
+
+    def build_follows(self, row):
+        user_id = self.user_id(row['user'])
+        author_id = self.user_id(row['author'])
+        if user_id is None or author_id is None or user_id == author_id:
+            return self.skip()
+        return Follow(user_id=user_id, author_id=author_id)
+
+    def new_rows(self, batch, fields):
+        """Rows of ``batch`` whose ids are free; stop at a taken id.
+
+        A row with the same id and the same data was imported before and
+        is skipped. Any other row under that id belongs to the target
+        database, and writing around it would hang comments on the wrong
+        post.
+        """
+        model = type(batch[0])
+        saved = model.objects.only(*fields).in_bulk(
+            [obj.pk for obj in batch if obj.pk is not None])
+        rows = []
+        for obj in batch:
+            existing = saved.get(obj.pk)
+            if existing is None:
+                rows.append(obj)
+            elif all(getattr(existing, name) == getattr(obj, name)
+                     for name in fields):
+                self.skip()
+            else:
+                raise CommandError(
+                    f'{model._meta.verbose_name} {obj.pk} already exists '
+                    f'with other data; import into an empty database.')
+        return rows
+
+    def new_posts(self, batch):
+        return self.new_rows(batch, ['author_id', 'text'])
+
+    def new_comments(self, batch):
+        return self.new_rows(batch, ['post_id', 'author_id', 'text'])
+
+    def new_follows(self, batch):
+        pairs = set(Follow.objects.filter(
+            user_id__in={follow.user_id for follow in batch}).values_list(
+            'user_id', 'author_id'))
+        rows = []
+        for follow in batch:
+            pair = (follow.user_id, follow.author_id)
+            if pair in pairs:
+                self.skip()
+            else:
+                pairs.add(pair)
+                rows.append(follow)
+        return rows
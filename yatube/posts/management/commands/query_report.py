@@ -0,0 +1,55 @@
+import sys
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from core.middleware import dump_report, reset_report
+from posts import urls
+from posts.models import Post
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Request every URL of the posts app once and print the query '
+        'budget report.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--format', choices=('json', 'csv'), default='json')
+        parser.add_argument('--output', help='File to write, default stdout')
+
+    def sample_kwargs(self):
+        post = Post.objects.select_related('author', 'group').filter(
+            group__isnull=False).order_by('-pub_date').first()
+        if post is None:
+            raise CommandError('Need at least one post with a group.')
+        # The author visits their own pages, so follow/unfollow are no-ops.
+        return post.author, {
+            'username': post.author.username,
+            'post_id': post.pk,
+            'slug': post.group.slug,
+        }
+
+    def handle(self, *args, **options):
+        author, values = self.sample_kwargs()
+        client = Client()
+        client.force_login(author)
+        reset_report()
+        with override_settings(QUERY_BUDGET_ENABLED=True):
+            for pattern in urls.urlpatterns:
+                kwargs = {
+                    name: values[name]
+                    for name in pattern.pattern.converters}
+                url = reverse(
+                    f'{urls.app_name}:{pattern.name}', kwargs=kwargs)
+                client.get(url)
+        if options['output']:
+            with open(options['output'], 'w', newline='') as stream:
+                dump_report(stream, options['format'])
+        else:
+            dump_report(sys.stdout, options['format'])
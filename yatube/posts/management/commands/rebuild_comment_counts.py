@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from posts.models import Comment, Post
+
+
+class Command(BaseCommand):
+    help = 'Recalculate Post.comment_count from the comments table.'
+
+    def handle(self, *args, **options):
+        counts = Comment.objects.filter(post=OuterRef('pk')).order_by(
+        ).values('post').annotate(total=Count('pk')).values('total')
+        with transaction.atomic():
+            updated = Post.objects.update(comment_count=Coalesce(
+                Subquery(counts, output_field=IntegerField()), 0))
+        self.stdout.write(f'Updated {updated} posts.')
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts import groups
+from posts.stats import rebuild_groups
+
+
+class Command(BaseCommand):
+    help = 'Recalculate Group.post_count from the posts table.'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            updated = rebuild_groups()
+        groups.changed()
+        self.stdout.write(f'Updated {updated} groups.')
@@ -0,0 +1,34 @@
+import itertools
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from posts.models import Post
+from posts.search import get_backend
+
+
+class Command(BaseCommand):
+    help = 'Drop and refill the full-text search index of posts.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        backend = get_backend()
+        start = time.perf_counter()
+        total = 0
+        rows = Post.objects.values_list('pk', 'text').iterator()
+        with transaction.atomic(), connection.cursor() as cursor:
+            backend.drop(cursor)
+            backend.create(cursor)
+            while True:
+                batch = list(itertools.islice(rows, options['batch_size']))
+                if not batch:
+                    break
+                backend.index(cursor, batch)
+                total += len(batch)
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            f'Indexed {total} posts in {elapsed:.1f}s '
+            f'({total / max(elapsed, 1e-9):.0f} posts/s).')
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.stats import rebuild
+
+
+class Command(BaseCommand):
+    help = (
+        'Recalculate AuthorStats (posts, followers, following, last post) '
+        'from the posts and follows tables, creating missing rows.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'user_ids', nargs='*', type=int,
+            help='Only these users; all users by default.')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            updated = rebuild(options['user_ids'] or None)
+        self.stdout.write(f'Updated {updated} authors.')
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from posts.tasks import send_digests
+
+
+class Command(BaseCommand):
+    help = (
+        'Mail every follower one digest of the new posts they were '
+        'notified of since the last run. Meant to be run from cron.')
+
+    def handle(self, *args, **options):
+        sent = send_digests()
+        self.stdout.write(f'Sent {sent} digests.')
@@ -0,0 +1,41 @@
+# Generated by Django 2.2.6 on 2026-10-18 19:20
+
+import itertools
+
+from django.db import migrations
+
+BATCH_SIZE = 1000
+
+
+def create_search_index(apps, schema_editor):
+    from posts.search import get_backend
+
+    backend = get_backend(schema_editor.connection.vendor)
+    Post = apps.get_model('posts', 'Post')
+    rows = Post.objects.values_list('pk', 'text').iterator()
+    with schema_editor.connection.cursor() as cursor:
+        backend.create(cursor)
+        while True:
+            batch = list(itertools.islice(rows, BATCH_SIZE))
+            if not batch:
+                break
+            backend.index(cursor, batch)
+
+
+def drop_search_index(apps, schema_editor):
+    from posts.search import get_backend
+
+    backend = get_backend(schema_editor.connection.vendor)
+    with schema_editor.connection.cursor() as cursor:
+        backend.drop(cursor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0017_author_stats'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
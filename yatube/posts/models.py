@@ -1,4 +1,7 @@
+import json
+
 from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
 from django.db import models
 
 User = get_user_model()
@@ -33,10 +36,50 @@ class Post(models.Model):
         blank=True,
         null=True
     )
+    comment_count = models.PositiveIntegerField(
+        'Комментариев',
+        default=0,
+        editable=False
+    )
+    version = models.PositiveIntegerField(
+        'Версия',
+        default=1,
+        editable=False
+    )
+    thumbnails = models.TextField(
+        'Миниатюры',
+        blank=True,
+        default='',
+        editable=False
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['-pub_date', '-id'], name='post_date_idx'),
+            models.Index(
+                fields=['author', '-pub_date', '-id'],
+                name='post_author_date_idx'),
+            models.Index(
+                fields=['group', '-pub_date', '-id'],
+                name='post_group_date_idx'),
+        ]
 
     def __str__(self) -> str:
         return self.text[:15]
 
+    @property
+    def thumbnail_list(self):
+        if not self.thumbnails:
+            return []
+        return [
+            dict(
+                variant,
+                url=default_storage.url(variant['jpeg']),
+                webp_url=default_storage.url(variant['webp']))
+            for variant in json.loads(self.thumbnails)
+        ]
+
 
 class Follow(models.Model):
     author = models.ForeignKey(
@@ -50,6 +93,70 @@ class Follow(models.Model):
         related_name='follower',
     )
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'author'], name='unique_follow'),
+        ]
+
+
+class TimelineEntry(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    post = models.ForeignKey(
+        'Post',
+        on_delete=models.CASCADE,
+        related_name='timeline_entries'
+    )
+    pub_date = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'], name='unique_timeline_post'),
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date', '-post'],
+                name='timeline_user_date_idx'),
+            models.Index(
+                fields=['user', 'author'], name='timeline_user_author_idx'),
+        ]
+
+
+class AuthorStats(models.Model):
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats'
+    )
+    post_count = models.PositiveIntegerField(
+        'Постов',
+        default=0
+    )
+    follower_count = models.PositiveIntegerField(
+        'Подписчиков',
+        default=0
+    )
+    following_count = models.PositiveIntegerField(
+        'Подписок',
+        default=0
+    )
+    last_post = models.DateTimeField(
+        'Последний пост',
+        blank=True,
+        null=True
+    )
+
 
 class Comment(models.Model):
     text = models.TextField(
@@ -70,6 +177,46 @@ class Comment(models.Model):
         related_name='comments'
     )
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['post', '-created', '-id'],
+                name='comment_post_created_idx'),
+        ]
+
+
+class Notification(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='notifications'
+    )
+    post = models.ForeignKey(
+        'Post',
+        on_delete=models.CASCADE,
+        related_name='notifications'
+    )
+    created = models.DateTimeField(
+        'Дата',
+        auto_now_add=True
+    )
+    emailed = models.BooleanField(
+        'Отправлено письмом',
+        default=False
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'], name='unique_notification'),
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-created'], name='notification_user_idx'),
+            models.Index(
+                fields=['emailed', 'user'], name='notification_digest_idx'),
+        ]
+
 
 class Group(models.Model):
     title = models.CharField(
@@ -79,6 +226,11 @@ class Group(models.Model):
         unique=True
     )
     description = models.TextField()
+    post_count = models.PositiveIntegerField(
+        'Постов',
+        default=0,
+        editable=False
+    )
 
     def __str__(self) -> str:
         return self.title
@@ -0,0 +1,245 @@
+"""Full-text search over posts.
+
+Posts are indexed in a side table keyed by post id: an FTS5 table on
+SQLite (words are stemmed in Python, see ``stemmer``) and a ``tsvector``
+column with a GIN index on PostgreSQL (stemmed by the ``russian`` text
+search configuration). Both backends rank matches so that a higher rank is
+better and page through them by ``(rank, post id)`` instead of OFFSET.
+Only the newest ``SEARCH_CANDIDATES`` matches are ranked: the index hands
+them out in post id order without scoring the rest, so a word found in
+every post costs about as much as a rare one. On SQLite they are ranked
+here with BM25 and cached word counts (FTS5's ``bm25()`` recounts every
+match of every word on each query).
+
+Signals keep the index in step with posts; ``manage.py
+rebuild_search_index`` refills it after bulk loads. The index table is not
+a model, so ``flush`` (and with it the teardown of a TransactionTestCase)
+leaves its rows behind; ``remove_stale`` drops them on ``post_migrate``,
+which ``flush`` sends when it is done.
+"""
+import base64
+import json
+import math
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+
+from .models import Post
+from .stemmer import stem_words
+
+TABLE = 'posts_post_search'
+ROWS_KEY = 'search:rows'
+FREQUENCY_TIMEOUT = 3600
+# Okapi BM25 parameters, the defaults of FTS5's bm25().
+K1 = 1.2
+B = 0.75
+
+
+def bm25(rows, total, found_in):
+    """``(rowid, rank)`` of indexed ``rows``, higher is better.
+
+    ``total`` and ``found_in`` are the index size and per-word row counts;
+    the average length is taken over ``rows``.
+    """
+    documents = [(pk, body.split()) for pk, body in rows]
+    average = sum(len(words) for _, words in documents) / len(documents)
+    weights = {
+        word: math.log(1 + (total - count + 0.5) / (count + 0.5))
+        for word, count in found_in.items()}
+    for pk, words in documents:
+        counts = Counter(words)
+        norm = K1 * (1 - B + B * len(words) / max(average, 1))
+        yield pk, sum(
+            weight * counts[word] * (K1 + 1) / (counts[word] + norm)
+            for word, weight in weights.items())
+
+
+class SQLiteSearch:
+    def create(self, cursor):
+        cursor.execute(
+            f'CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} '
+            f'USING fts5(body, tokenize="unicode61 remove_diacritics 2")')
+
+    def drop(self, cursor):
+        cursor.execute(f'DROP TABLE IF EXISTS {TABLE}')
+
+    def index(self, cursor, rows):
+        rows = [(pk, ' '.join(stem_words(text))) for pk, text in rows]
+        cursor.executemany(
+            f'DELETE FROM {TABLE} WHERE rowid = %s', [[pk] for pk, _ in rows])
+        cursor.executemany(
+            f'INSERT INTO {TABLE} (rowid, body) VALUES (%s, %s)', rows)
+
+    def remove(self, cursor, ids):
+        cursor.executemany(
+            f'DELETE FROM {TABLE} WHERE rowid = %s', [[pk] for pk in ids])
+
+    def match(self, words):
+        return ' '.join('"{}"'.format(word) for word in words)
+
+    def remove_stale(self, cursor):
+        cursor.execute(
+            f'DELETE FROM {TABLE} WHERE rowid NOT IN '
+            f'(SELECT id FROM {Post._meta.db_table})')
+
+    def frequencies(self, cursor, words):
+        """Rows in the index and, for each word, rows that contain it.
+
+        Both walk every match, which is what makes FTS5's own bm25() slow
+        for common words, so they are cached for ``FREQUENCY_TIMEOUT``.
+        """
+        keys = {word: f'search:rows:{word}' for word in words}
+        cached = cache.get_many([ROWS_KEY, *keys.values()])
+        counts = {}
+        if ROWS_KEY not in cached:
+            counts[ROWS_KEY] = (f'SELECT COUNT(*) FROM {TABLE}_docsize', [])
+        for word, key in keys.items():
+            if key not in cached:
+                counts[key] = (
+                    f'SELECT COUNT(*) FROM {TABLE} WHERE {TABLE} MATCH %s',
+                    [self.match([word])])
+        if counts:
+            # All missing counts in one query.
+            cursor.execute('SELECT ' + ', '.join(
+                f'({sql})' for sql, _ in counts.values()), [
+                param for _, params in counts.values() for param in params])
+            fetched = dict(zip(counts, cursor.fetchone()))
+            cache.set_many(fetched, FREQUENCY_TIMEOUT)
+            cached.update(fetched)
+        return cached[ROWS_KEY], {
+            word: cached[key] for word, key in keys.items()}
+
+    def search(self, cursor, query, after, limit, candidates):
+        words = stem_words(query)
+        if not words:
+            return []
+        cursor.execute(
+            f'SELECT rowid, body FROM {TABLE} WHERE {TABLE} MATCH %s '
+            f'ORDER BY rowid DESC LIMIT %s',
+            [self.match(words), candidates])
+        rows = cursor.fetchall()
+        if not rows:
+            return []
+        total, found_in = self.frequencies(cursor, set(words))
+        matches = sorted(
+            ((pk, rank) for pk, rank in bm25(rows, total, found_in)
+             if after is None or (rank, pk) < after),
+            key=lambda match: (match[1], match[0]), reverse=True)
+        return matches[:limit]
+
+
+class PostgresSearch:
+    config = 'russian'
+
+    def create(self, cursor):
+        cursor.execute(
+            f'CREATE TABLE IF NOT EXISTS {TABLE} ('
+            f'post_id integer PRIMARY KEY REFERENCES {Post._meta.db_table} '
+            f'(id) ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, '
+            f'document tsvector NOT NULL)')
+        cursor.execute(
+            f'CREATE INDEX IF NOT EXISTS {TABLE}_document_idx '
+            f'ON {TABLE} USING gin (document)')
+
+    def drop(self, cursor):
+        cursor.execute(f'DROP TABLE IF EXISTS {TABLE}')
+
+    def index(self, cursor, rows):
+        cursor.executemany(
+            f'INSERT INTO {TABLE} (post_id, document) '
+            f'VALUES (%s, to_tsvector(%s, %s)) '
+            f'ON CONFLICT (post_id) DO UPDATE SET document = '
+            f'EXCLUDED.document',
+            [(pk, self.config, text) for pk, text in rows])
+
+    def remove(self, cursor, ids):
+        cursor.execute(
+            f'DELETE FROM {TABLE} WHERE post_id = ANY(%s)', [list(ids)])
+
+    def remove_stale(self, cursor):
+        cursor.execute(
+            f'DELETE FROM {TABLE} WHERE post_id NOT IN '
+            f'(SELECT id FROM {Post._meta.db_table})')
+
+    def search(self, cursor, query, after, limit, candidates):
+        sql = (
+            f'SELECT id, rank FROM ('
+            f'SELECT post_id AS id, ts_rank_cd(document, query) AS rank '
+            f'FROM (SELECT post_id, document, query '
+            f'FROM {TABLE}, websearch_to_tsquery(%s, %s) query '
+            f'WHERE document @@ query ORDER BY post_id DESC LIMIT %s) '
+            f'candidates) matches')
+        params = [self.config, query, candidates]
+        if after is not None:
+            sql += ' WHERE (rank, id) < (%s, %s)'
+            params += list(after)
+        cursor.execute(
+            sql + ' ORDER BY rank DESC, id DESC LIMIT %s', params + [limit])
+        return cursor.fetchall()
+
+
+BACKENDS = {
+    'sqlite': SQLiteSearch,
+    'postgresql': PostgresSearch,
+}
+
+
+def get_backend(vendor=None):
+    return BACKENDS[vendor or connection.vendor]()
+
+
+def index_posts(posts):
+    rows = [(post.pk, post.text) for post in posts]
+    if rows:
+        with connection.cursor() as cursor:
+            get_backend().index(cursor, rows)
+
+
+def remove_posts(ids):
+    ids = list(ids)
+    if ids:
+        with connection.cursor() as cursor:
+            get_backend().remove(cursor, ids)
+
+
+def remove_stale(using=DEFAULT_DB_ALIAS):
+    """Drop index rows of posts that no longer exist."""
+    db = connections[using]
+    with db.cursor() as cursor:
+        if TABLE in db.introspection.table_names(cursor):
+            get_backend(db.vendor).remove_stale(cursor)
+
+
+def encode_cursor(rank, pk):
+    payload = json.dumps([rank, pk]).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        rank, pk = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return float(rank), int(pk)
+    except Exception:
+        return None
+
+
+def search(query, cursor=None, limit=10):
+    """Posts matching ``query``, best first, and the cursor of the next page.
+
+    ``cursor`` is the value returned with the previous page.
+    """
+    after = decode_cursor(cursor) if cursor else None
+    with connection.cursor() as db_cursor:
+        matches = get_backend().search(
+            db_cursor, query, after, limit + 1, settings.SEARCH_CANDIDATES)
+    next_cursor = None
+    if len(matches) > limit:
+        matches = matches[:limit]
+        pk, rank = matches[-1]
+        next_cursor = encode_cursor(rank, pk)
+    posts = Post.objects.select_related('author', 'group').in_bulk(
+        [pk for pk, _ in matches])
+    return [posts[pk] for pk, _ in matches if pk in posts], next_cursor
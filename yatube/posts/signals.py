@@ -0,0 +1,115 @@
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import (post_delete, post_migrate, post_save,
+                                      pre_save)
+from django.dispatch import receiver
+
+from core import jobs
+
+from . import etags, feed_cache, groups, search, stats, timeline
+from .models import Comment, Follow, Group, Post, User
+
+
+@receiver(post_save, sender=Comment)
+def comment_created(sender, instance, created, **kwargs):
+    if created:
+        Post.objects.filter(pk=instance.post_id).update(
+            comment_count=F('comment_count') + 1,
+            version=F('version') + 1)
+        etags.posts_changed()
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    Post.objects.filter(pk=instance.post_id, comment_count__gt=0).update(
+        comment_count=F('comment_count') - 1,
+        version=F('version') + 1)
+    etags.posts_changed()
+
+
+@receiver(pre_save, sender=Post)
+def post_changing(sender, instance, raw=False, **kwargs):
+    if not instance._state.adding and not raw:
+        saved = Post.objects.filter(pk=instance.pk).values_list(
+            'group_id', 'version').first()
+        if saved is not None:
+            instance._saved_group_id, instance._saved_version = saved
+        instance.version = F('version') + 1
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, raw=False, **kwargs):
+    feed_cache.invalidate('index')
+    etags.posts_changed()
+    if not created and not raw:
+        # The row was bumped with F(); what it most likely holds now.
+        instance.version = getattr(instance, '_saved_version', 0) + 1
+    if not raw and stats.group_changed(
+            getattr(instance, '_saved_group_id', None), instance.group_id):
+        groups.changed()
+    if not raw:
+        search.index_posts([instance])
+    if created and not raw:
+        stats.post_added(instance)
+        timeline.fan_out_post(instance)
+        transaction.on_commit(lambda: jobs.enqueue(
+            'posts.tasks.notify_followers', instance.pk))
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    feed_cache.invalidate('index')
+    etags.posts_changed()
+    stats.post_removed(instance)
+    if stats.group_changed(instance.group_id, None):
+        groups.changed()
+    search.remove_posts([instance.pk])
+
+
+@receiver(post_save, sender=User)
+def user_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        stats.user_added(instance)
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, raw=False, **kwargs):
+    etags.follows_changed()
+    if created and not raw:
+        stats.follow_added(instance)
+        timeline.add_author(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    etags.follows_changed()
+    stats.follow_removed(instance)
+    timeline.remove_author(instance.user_id, instance.author_id)
+
+
+@receiver(pre_save, sender=Group)
+def group_changing(sender, instance, raw=False, **kwargs):
+    if not instance._state.adding and not raw:
+        instance._saved_card = Group.objects.filter(
+            pk=instance.pk).values_list('title', 'slug').first()
+
+
+@receiver(post_save, sender=Group)
+def group_saved(sender, instance, created, raw=False, **kwargs):
+    etags.posts_changed()
+    groups.changed()
+    # Post cards show the group's title and link, nothing else of it.
+    if not created and not raw and getattr(
+            instance, '_saved_card', None) != (instance.title, instance.slug):
+        instance.posts.update(version=F('version') + 1)
+
+
+@receiver(post_delete, sender=Group)
+def group_deleted(sender, instance, **kwargs):
+    groups.changed()
+
+
+@receiver(post_migrate)
+def tables_flushed(sender, using, **kwargs):
+    if sender.label == 'posts':
+        search.remove_stale(using)
@@ -0,0 +1,113 @@
+"""Per-author counters kept next to the user row, post counts of groups.
+
+A row is created with its user and signals adjust the counters with
+single UPDATE statements. A missing row (users inserted in bulk) is built
+from scratch by ``rebuild``, which is also what
+``manage.py reconcile_author_stats`` runs for every user.
+``rebuild_groups`` (``manage.py rebuild_group_counts``) recounts groups.
+"""
+from django.db.models import (Case, Count, DateTimeField, F, IntegerField,
+                              OuterRef, Subquery, Value, When)
+from django.db.models.functions import Coalesce
+
+from .bulk import batches
+from .models import AuthorStats, Follow, Group, Post, User
+
+
+def _count(model, field):
+    counts = model.objects.filter(**{field: OuterRef('pk')}).order_by(
+    ).values(field).annotate(total=Count('pk')).values('total')
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
+def _latest_post():
+    return Subquery(Post.objects.filter(author=OuterRef('pk')).order_by(
+        '-pub_date').values('pub_date')[:1])
+
+
+def rebuild(user_ids=None, batch_size=1000):
+    """Recount the stats of the given users (all users by default)."""
+    users = User.objects.all()
+    stats = AuthorStats.objects.all()
+    if user_ids is not None:
+        users = users.filter(pk__in=user_ids)
+        stats = stats.filter(pk__in=user_ids)
+    missing = users.filter(stats__isnull=True).values_list('pk', flat=True)
+    # Batches of our own: on Django 2.2 a batch_size passed to bulk_create
+    # overrides the backend's limit (500 rows per INSERT on SQLite).
+    for batch in batches(missing.iterator(), batch_size):
+        AuthorStats.objects.bulk_create(
+            [AuthorStats(user_id=pk) for pk in batch], ignore_conflicts=True)
+    return stats.update(
+        post_count=_count(Post, 'author'),
+        follower_count=_count(Follow, 'author'),
+        following_count=_count(Follow, 'user'),
+        last_post=_latest_post())
+
+
+def rebuild_groups():
+    return Group.objects.update(post_count=_count(Post, 'group'))
+
+
+def for_user(user):
+    """Stats of a user fetched with ``select_related('stats')``."""
+    try:
+        return user.stats
+    except AuthorStats.DoesNotExist:
+        return AuthorStats(user=user)
+
+
+def _increment(user_id, **changes):
+    if not AuthorStats.objects.filter(pk=user_id).update(**changes):
+        rebuild([user_id])
+
+
+def user_added(user):
+    AuthorStats.objects.create(user=user)
+
+
+def post_added(post):
+    _increment(
+        post.author_id,
+        post_count=F('post_count') + 1,
+        last_post=Case(
+            When(last_post__gt=post.pub_date, then=F('last_post')),
+            default=Value(post.pub_date, output_field=DateTimeField()),
+            output_field=DateTimeField()))
+
+
+def post_removed(post):
+    AuthorStats.objects.filter(pk=post.author_id).update(
+        post_count=Case(
+            When(post_count__gt=0, then=F('post_count') - 1), default=0),
+        last_post=Case(
+            When(last_post__gt=post.pub_date, then=F('last_post')),
+            default=_latest_post(),
+            output_field=DateTimeField()))
+
+
+def follow_added(follow):
+    _increment(follow.author_id, follower_count=F('follower_count') + 1)
+    _increment(follow.user_id, following_count=F('following_count') + 1)
+
+
+def follow_removed(follow):
+    AuthorStats.objects.filter(
+        pk=follow.author_id, follower_count__gt=0).update(
+        follower_count=F('follower_count') - 1)
+    AuthorStats.objects.filter(
+        pk=follow.user_id, following_count__gt=0).update(
+        following_count=F('following_count') - 1)
+
+
+def group_changed(old_group_id, new_group_id):
+    """Move a post between groups; ``None`` stands for no group."""
+    if old_group_id == new_group_id:
+        return False
+    if old_group_id is not None:
+        Group.objects.filter(pk=old_group_id, post_count__gt=0).update(
+            post_count=F('post_count') - 1)
+    if new_group_id is not None:
+        Group.objects.filter(pk=new_group_id).update(
+            post_count=F('post_count') + 1)
+    return True
@@ -0,0 +1,110 @@
+"""Snowball stemmer for Russian.
+
+SQLite has no Russian stemming, so words are stemmed here before they
+reach the FTS5 index and the same function is applied to queries. Follows
+https://snowballstem.org/algorithms/russian/stemmer.html.
+"""
+import re
+
+VOWELS = 'аеиоуыэюя'
+AFTER_A = ('а', 'я')
+
+PERFECTIVE_GERUND = (
+    (('в', 'вши', 'вшись'), AFTER_A),
+    (('ив', 'ивши', 'ившись', 'ыв', 'ывши', 'ывшись'), None),
+)
+REFLEXIVE = ((('ся', 'сь'), None),)
+ADJECTIVE = ((
+    ('ее', 'ие', 'ые', 'ое', 'ими', 'ыми', 'ей', 'ий', 'ый', 'ой', 'ем',
+     'им', 'ым', 'ом', 'его', 'ого', 'ему', 'ому', 'их', 'ых', 'ую', 'юю',
+     'ая', 'яя', 'ою', 'ею'), None),)
+PARTICIPLE = (
+    (('ем', 'нн', 'вш', 'ющ', 'щ'), AFTER_A),
+    (('ивш', 'ывш', 'ующ'), None),
+)
+VERB = (
+    (('ла', 'на', 'ете', 'йте', 'ли', 'й', 'л', 'ем', 'н', 'ло', 'но',
+      'ет', 'ют', 'ны', 'ть', 'ешь', 'нно'), AFTER_A),
+    (('ила', 'ыла', 'ена', 'ейте', 'уйте', 'ите', 'или', 'ыли', 'ей',
+      'уй', 'ил', 'ыл', 'им', 'ым', 'ен', 'ило', 'ыло', 'ено', 'ят', 'ует',
+      'уют', 'ит', 'ыт', 'ены', 'ить', 'ыть', 'ишь', 'ую', 'ю'), None),
+)
+NOUN = ((
+    ('а', 'ев', 'ов', 'ие', 'ье', 'е', 'иями', 'ями', 'ами', 'еи', 'ии',
+     'и', 'ией', 'ей', 'ой', 'ий', 'й', 'иям', 'ям', 'ием', 'ем', 'ам',
+     'ом', 'о', 'у', 'ах', 'иях', 'ях', 'ы', 'ь', 'ию', 'ью', 'ю', 'ия',
+     'ья', 'я'), None),)
+SUPERLATIVE = ((('ейш', 'ейше'), None),)
+DERIVATIONAL = ((('ост', 'ость'), None),)
+
+WORD_RE = re.compile(r'\w+')
+CYRILLIC_RE = re.compile('[а-я]')
+
+
+def _region_after_syllable(word, start):
+    """Index after the first non-vowel that follows a vowel."""
+    for i in range(start, len(word)):
+        if word[i] not in VOWELS and word[i - 1] in VOWELS:
+            return i + 1
+    return len(word)
+
+
+def _remove(word, start, groups):
+    """Drop the longest suffix of ``groups`` lying in ``word[start:]``.
+
+    A suffix from a group with a condition only counts when preceded by
+    one of the given letters, also inside the region.
+    """
+    region = word[start:]
+    found = None
+    for suffixes, preceded in groups:
+        for suffix in suffixes:
+            if region.endswith(suffix) and (
+                    found is None or len(suffix) > len(found[0])):
+                found = suffix, preceded
+    if found is None:
+        return word, False
+    suffix, preceded = found
+    if preceded and not region[:-len(suffix)].endswith(preceded):
+        return word, False
+    return word[:-len(suffix)], True
+
+
+def stem(word):
+    word = word.lower().replace('ё', 'е')
+    rv = next(
+        (i + 1 for i, letter in enumerate(word) if letter in VOWELS),
+        len(word))
+    r1 = _region_after_syllable(word, 1)
+    r2 = _region_after_syllable(word, r1 + 1)
+
+    word, removed = _remove(word, rv, PERFECTIVE_GERUND)
+    if not removed:
+        word, _ = _remove(word, rv, REFLEXIVE)
+        word, removed = _remove(word, rv, ADJECTIVE)
+        if removed:
+            word, _ = _remove(word, rv, PARTICIPLE)
+        else:
+            word, removed = _remove(word, rv, VERB)
+            if not removed:
+                word, _ = _remove(word, rv, NOUN)
+
+    if word[rv:].endswith('и'):
+        word = word[:-1]
+    word, _ = _remove(word, r2, DERIVATIONAL)
+
+    if word[rv:].endswith('нн'):
+        return word[:-1]
+    word, removed = _remove(word, rv, SUPERLATIVE)
+    if removed:
+        return word[:-1] if word[rv:].endswith('нн') else word
+    if word[rv:].endswith('ь'):
+        return word[:-1]
+    return word
+
+
+def stem_words(text):
+    """Lowercased words of ``text``, Russian ones stemmed."""
+    words = WORD_RE.findall(text.lower())
+    return [stem(word) if CYRILLIC_RE.search(word) else word
+            for word in words]
@@ -0,0 +1,104 @@
+import itertools
+import json
+
+from django.conf import settings
+from django.core import mail
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import F
+from django.template.loader import render_to_string
+from django.urls import reverse
+
+from . import etags, images
+from .models import Follow, Notification, Post
+
+
+def make_thumbnails(post_id):
+    post = Post.objects.filter(pk=post_id).first()
+    if post is None:
+        return
+    images.delete_variants(post.thumbnail_list)
+    original = post.image.name
+    variants = []
+    if post.image:
+        post.image = images.shrink_original(post.image)
+        variants = images.render_variants(post.image, post.pk)
+    updated = Post.objects.filter(pk=post_id, image=original).update(
+        image=post.image.name,
+        thumbnails=json.dumps(variants),
+        version=F('version') + 1)
+    if not updated:
+        # The image was replaced meanwhile; its own job will redo this.
+        images.delete_variants(variants)
+        if post.image.name != original:
+            default_storage.delete(post.image.name)
+        return
+    if post.image.name != original:
+        default_storage.delete(original)
+    etags.posts_changed()
+
+
+def notify_followers(post_id):
+    """Write a notification of a new post for every follower of its author.
+
+    Followers are read in keyset batches of ``NOTIFY_BATCH_SIZE``.
+    """
+    post = Post.objects.filter(pk=post_id).only('pk', 'author_id').first()
+    if post is None:
+        return
+    followers = Follow.objects.filter(author_id=post.author_id).order_by(
+        'pk').values_list('pk', 'user_id')
+    last = 0
+    while True:
+        batch = list(followers.filter(
+            pk__gt=last)[:settings.NOTIFY_BATCH_SIZE])
+        if not batch:
+            return
+        Notification.objects.bulk_create(
+            [Notification(user_id=user_id, post_id=post_id)
+             for _, user_id in batch],
+            ignore_conflicts=True)
+        last = batch[-1][0]
+
+
+def _digest(user, notifications):
+    posts = [{
+        'author': notification.post.author.username,
+        'text': notification.post.text,
+        'url': settings.SITE_URL + reverse('post:post_detail', kwargs={
+            'username': notification.post.author.username,
+            'post_id': notification.post_id}),
+    } for notification in notifications]
+    return mail.EmailMessage(
+        subject='Новые записи авторов, на которых вы подписаны',
+        body=render_to_string(
+            'posts/email/digest.txt', {'user': user, 'posts': posts}),
+        to=[user.email])
+
+
+def send_digests():
+    """Mail each user one letter listing the posts they were not told of.
+
+    Users without an email address are left alone.
+    """
+    pending = Notification.objects.filter(emailed=False).exclude(
+        user__email='')
+    sent = 0
+    with mail.get_connection() as connection:
+        while True:
+            users = list(pending.order_by('user').values_list(
+                'user', flat=True).distinct()[:settings.DIGEST_BATCH_SIZE])
+            if not users:
+                return sent
+            notifications = pending.filter(user__in=users).select_related(
+                'user', 'post__author').order_by('user', 'created')
+            messages, ids = [], []
+            for _, group in itertools.groupby(
+                    notifications, key=lambda item: item.user_id):
+                group = list(group)
+                messages.append(_digest(group[0].user, group))
+                ids += [notification.pk for notification in group]
+            connection.send_messages(messages)
+            with transaction.atomic():
+                Notification.objects.filter(pk__in=ids).update(emailed=True)
+            sent += len(messages)
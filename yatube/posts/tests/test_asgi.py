@@ -0,0 +1,92 @@
+import asyncio
+import threading
+
+from django.contrib.auth import get_user_model
+from django.core.wsgi import get_wsgi_application
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase
+
+from core.asgi import WsgiToAsgi
+from core.parallel import gather
+
+from ..models import Post
+
+User = get_user_model()
+
+
+def call(application, path, query_string=b'', method='GET', body=(b'',)):
+    sent = []
+    messages = [
+        {'type': 'http.request', 'body': chunk, 'more_body': True}
+        for chunk in body]
+    messages[-1]['more_body'] = False
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(application({
+        'type': 'http',
+        'method': method,
+        'path': path,
+        'query_string': query_string,
+        'headers': [(b'host', b'localhost'), (b'accept', b'text/html')],
+    }, receive, send))
+    return sent
+
+
+class AsgiTest(TestCase):
+    def test_wsgi_application_is_served(self):
+        """ASGI-сервер получает ответ Django целиком."""
+        application = WsgiToAsgi(get_wsgi_application(), 2)
+        start, body = call(application, '/about/author/')
+        self.assertEqual(start['status'], 200)
+        self.assertIn(
+            (b'content-type', b'text/html; charset=utf-8'), start['headers'])
+        self.assertIn('Об авторе', body['body'].decode())
+        start, _ = call(application, '/about/missing/')
+        self.assertEqual(start['status'], 404)
+
+    def test_repeated_cookie_headers(self):
+        """Куки из нескольких заголовков (HTTP/2) не склеиваются в одну."""
+        application = WsgiToAsgi(get_wsgi_application(), 1)
+        environ = application.environ({
+            'type': 'http', 'method': 'GET', 'path': '/',
+            'headers': [(b'cookie', b'a=1'), (b'cookie', b'b=2'),
+                        (b'accept', b'text/html'), (b'accept', b'*/*')]})
+        self.assertEqual(environ['HTTP_COOKIE'], 'a=1; b=2')
+        self.assertEqual(environ['HTTP_ACCEPT'], 'text/html,*/*')
+
+    def test_request_body_is_spooled(self):
+        """Тело запроса из нескольких частей доходит до приложения."""
+        def echo(environ, start_response):
+            start_response('200 OK', [('Content-Type', 'text/plain')])
+            length = int(environ['CONTENT_LENGTH'])
+            return [environ['wsgi.input'].read(length)]
+
+        application = WsgiToAsgi(echo, 1, spool_size=4)
+        _, body = call(
+            application, '/', method='POST', body=(b'text=', b'bla-bla'))
+        self.assertEqual(body['body'], b'text=bla-bla')
+
+
+class GatherTest(TransactionTestCase):
+    def test_queries_run_on_workers(self):
+        """Независимые запросы выполняются в других потоках."""
+        user = User.objects.create(username='MakarD')
+        Post.objects.create(text='bla-bla-bla', author=user)
+        count, (worker, posts) = gather(
+            lambda: Post.objects.count(),
+            lambda: (threading.current_thread().name,
+                     Post.objects.count()))
+        self.assertEqual((count, posts), (1, 1))
+        self.assertTrue(worker.startswith('queries'))
+
+    def test_transaction_keeps_queries_in_one_thread(self):
+        with transaction.atomic():
+            names = gather(
+                lambda: threading.current_thread().name,
+                lambda: threading.current_thread().name)
+        self.assertEqual(names[0], names[1])
@@ -0,0 +1,50 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core.middleware import QueryBudgetExceeded, get_report, reset_report
+
+from ..models import Post
+
+User = get_user_model()
+
+
+@override_settings(QUERY_BUDGET_ENABLED=True, QUERY_BUDGET_STRICT=False)
+class QueryBudgetTest(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = User.objects.create(username='MakarD')
+        Post.objects.create(text='bla-bla-bla', author=cls.user)
+
+    def setUp(self) -> None:
+        cache.clear()
+        reset_report()
+
+    def tearDown(self) -> None:
+        reset_report()
+
+    def test_requests_are_reported(self):
+        """Запросы к странице попадают в отчёт по представлению."""
+        self.client.get(reverse('post:index'))
+        report = get_report()['post:index']
+        self.assertEqual(report['requests'], 1)
+        self.assertGreater(report['queries'], 0)
+
+    @override_settings(QUERY_BUDGETS={'post:index': 0})
+    def test_overrun_is_logged(self):
+        with self.assertLogs('core.middleware', 'WARNING'):
+            response = self.client.get(reverse('post:index'))
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(QUERY_BUDGETS={'post:index': 0},
+                       QUERY_BUDGET_STRICT=True)
+    def test_overrun_fails_when_strict(self):
+        with self.assertRaises(QueryBudgetExceeded):
+            self.client.get(reverse('post:index'))
+
+    @override_settings(QUERY_BUDGET_ENABLED=False)
+    def test_disabled(self):
+        self.client.get(reverse('post:index'))
+        self.assertEqual(get_report(), {})
@@ -0,0 +1,80 @@
+import shutil
+import tempfile
+
+from django.test import SimpleTestCase, override_settings
+
+from core import caching
+from core.caching import LocalLRU, TwoTierCache
+
+SHARED_DIR = tempfile.mkdtemp()
+
+
+def two_tier(location):
+    return TwoTierCache(location, {'OPTIONS': {'SHARED': 'files'}})
+
+
+@override_settings(CACHES={
+    'default': {
+        'BACKEND': 'core.caching.TwoTierCache',
+        'LOCATION': 'test-default',
+        'OPTIONS': {'SHARED': 'files'},
+    },
+    'files': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': SHARED_DIR,
+    },
+})
+class TwoTierCacheTest(SimpleTestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(SHARED_DIR, ignore_errors=True)
+
+    def setUp(self) -> None:
+        self.first = two_tier('test-first')
+        self.second = two_tier('test-second')
+        self.first.clear()
+        self.second.clear()
+
+    def test_processes_share_the_second_tier(self):
+        """Значение, записанное одним процессом, видно другому."""
+        self.first.set('key', 'value')
+        self.assertEqual(self.second.get('key'), 'value')
+        self.assertEqual(len(self.second.local), 1)
+        self.assertTrue(self.first.add('counter', 1))
+        self.assertFalse(self.second.add('counter', 5))
+        self.assertEqual(self.second.incr('counter'), 2)
+
+    def test_local_tier_serves_repeated_reads(self):
+        self.first.set('key', 'value')
+        self.first.shared.set('key', 'changed')
+        self.assertEqual(self.first.get('key'), 'value')
+        self.first.delete('key')
+        self.assertIsNone(self.first.get('key'))
+
+    def test_invalidate_reaches_other_processes(self):
+        """Смена версии пространства имён видна сразу во всех процессах."""
+        self.assertEqual(caching.get_or_set('feed', 'page', 'old'), 'old')
+        self.second.shared.incr('version:feed')
+        self.assertEqual(caching.get_or_set('feed', 'page', 'new'), 'new')
+        caching.invalidate('feed')
+        self.assertEqual(caching.get_or_set('feed', 'page', 'last'), 'last')
+
+
+class LocalLRUTest(SimpleTestCase):
+    def test_evicts_least_recently_used_by_size(self):
+        lru = LocalLRU(max_bytes=10, timeout=60)
+        lru.set('a', b'aaaa')
+        lru.set('b', b'bbbb')
+        lru.get('a')
+        lru.set('c', b'cccc')
+        self.assertIsNone(lru.get('b'))
+        self.assertEqual(lru.get('a'), b'aaaa')
+        self.assertEqual(lru.size, 8)
+        lru.set('big', b'x' * 11)
+        self.assertIsNone(lru.get('big'))
+
+    def test_entries_expire(self):
+        lru = LocalLRU(max_bytes=10, timeout=0)
+        lru.set('a', b'aaaa')
+        self.assertIsNone(lru.get('a'))
@@ -0,0 +1,51 @@
+import json
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from ..bulk import explicit_dates
+from ..models import AuthorStats, Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class GenerateDataTest(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        call_command(
+            'generate_data', users=6, groups=2, posts=30, comments=40,
+            follows=2, days=3, batch_size=7, stdout=StringIO())
+
+    def test_dataset(self):
+        """Генератор создаёт пользователей, группы, посты и комментарии."""
+        self.assertEqual(User.objects.count(), 6)
+        self.assertEqual(Group.objects.count(), 2)
+        self.assertEqual(Post.objects.count(), 30)
+        self.assertEqual(Comment.objects.count(), 40)
+        self.assertTrue(Follow.objects.exists())
+        self.assertEqual(AuthorStats.objects.count(), 6)
+        dates = Post.objects.order_by('pk').values_list(
+            'pub_date', flat=True)
+        self.assertGreater(dates[29] - dates[0], timedelta(days=2))
+
+    def test_auto_now_add_is_restored(self):
+        field = Post._meta.get_field('pub_date')
+        self.assertTrue(field.auto_now_add)
+        with self.assertRaises(ValueError):
+            with explicit_dates(Post, 'pub_date'):
+                self.assertFalse(field.auto_now_add)
+                raise ValueError
+        self.assertTrue(field.auto_now_add)
+
+    def test_benchmark(self):
+        """Бенчмарк проходит по смеси страниц и печатает отчёт."""
+        stdout = StringIO()
+        call_command(
+            'benchmark', requests=10, warmup=2, max_page=2, json=True,
+            stdout=stdout)
+        report = json.loads(stdout.getvalue())
+        self.assertEqual(report['total']['requests'], 10)
@@ -12,6 +12,14 @@ from ..models import Group, Post
 
 User = get_user_model()
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
 
 
 @override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
@@ -45,17 +53,9 @@ class PostCreateFormTest(TestCase):
     def test_create_post_form(self):
         posts_count = Post.objects.count()
 
-        small_gif = (
-            b'\x47\x49\x46\x38\x39\x61\x02\x00'
-            b'\x01\x00\x80\x00\x00\x00\x00\x00'
-            b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
-            b'\x00\x00\x00\x2C\x00\x00\x00\x00'
-            b'\x02\x00\x01\x00\x00\x02\x02\x0C'
-            b'\x0A\x00\x3B'
-        )
         uploaded = SimpleUploadedFile(
             name='small.gif',
-            content=small_gif,
+            content=SMALL_GIF,
             content_type='image/gif'
         )
         form_data = {
@@ -96,3 +96,35 @@ class PostCreateFormTest(TestCase):
                 'post_id': post.pk}))
         self.assertEqual(PostCreateFormTest.post.text, form_data['text'])
         self.assertEqual(PostCreateFormTest.post.group.pk, form_data['group'])
+
+    @override_settings(FILE_UPLOAD_MAX_SIZE=1024)
+    def test_oversized_upload_rejected(self):
+        posts_count = Post.objects.count()
+        uploaded = SimpleUploadedFile(
+            name='big.gif',
+            content=b'GIF89a' + b'\x00' * 4096,
+            content_type='image/gif'
+        )
+        response = self.authorized_client.post(
+            reverse('post:post_create'),
+            data={'text': 'TL;DR', 'image': uploaded}
+        )
+        self.assertEqual(Post.objects.count(), posts_count)
+        self.assertEqual(
+            response.context['form'].errors.as_data()['image'][0].code,
+            'file_too_large')
+
+    @override_settings(POST_IMAGE_MAX_PIXELS=1)
+    def test_too_many_pixels_rejected(self):
+        uploaded = SimpleUploadedFile(
+            name='small.gif',
+            content=SMALL_GIF,
+            content_type='image/gif'
+        )
+        response = self.authorized_client.post(
+            reverse('post:post_create'),
+            data={'text': 'TL;DR', 'image': uploaded}
+        )
+        self.assertFormError(
+            response, 'form', 'image',
+            'Слишком большое изображение: 2×1.')
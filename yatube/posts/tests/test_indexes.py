@@ -0,0 +1,74 @@
+import re
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+FULL_SCAN = re.compile(r'SCAN (TABLE )?"?posts_\w+"?$')
+
+
+class FeedIndexesTest(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='MakarD')
+        cls.author = User.objects.create_user(username='AndreyG')
+        cls.group = Group.objects.create(
+            title='Black',
+            slug='black',
+            description='Test description'
+        )
+        for i in range(15):
+            Post.objects.create(
+                text=f'bla-bla-bla{i}', author=cls.author, group=cls.group)
+        cls.post = Post.objects.create(text='BlaBlaBla', author=cls.author)
+        for i in range(3):
+            Comment.objects.create(
+                text=f'comment{i}', post=cls.post, author=cls.user)
+        Follow.objects.create(user=cls.user, author=cls.author)
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(FeedIndexesTest.user)
+
+    def plan(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+            return [row[-1] for row in cursor.fetchall()]
+
+    def test_feed_queries_use_indexes(self):
+        """Запросы лент не читают таблицы posts_* целиком."""
+        if connection.vendor != 'sqlite':
+            self.skipTest('EXPLAIN QUERY PLAN is SQLite specific')
+        author = FeedIndexesTest.author.username
+        urls = [
+            reverse('post:index'),
+            reverse('post:index') + '?page=2',
+            reverse('post:group_list', kwargs={'slug': self.group.slug}),
+            reverse('post:profile', kwargs={'username': author}),
+            reverse('post:post_detail', kwargs={
+                'username': author, 'post_id': self.post.pk}),
+            reverse('post:follow_index'),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                with CaptureQueriesContext(connection) as queries:
+                    self.authorized_client.get(url)
+                for query in queries:
+                    sql = query['sql']
+                    if not sql.startswith('SELECT') or 'posts_' not in sql:
+                        continue
+                    if sql.endswith('FROM "posts_group"'):
+                        # The slug map of all groups, read once and cached.
+                        continue
+                    for step in self.plan(sql):
+                        self.assertIsNone(
+                            FULL_SCAN.search(step), f'{step}\n{sql}')
@@ -0,0 +1,49 @@
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TransactionTestCase
+
+
+class MigrationTest(TransactionTestCase):
+    """Data migrations run against a database that already has rows."""
+
+    def migrate(self, target):
+        executor = MigrationExecutor(connection)
+        executor.migrate([('posts', target)])
+        executor.loader.build_graph()
+        return executor.loader.project_state([('posts', target)]).apps
+
+    def tearDown(self) -> None:
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_duplicate_follows_are_removed(self):
+        """Повторные подписки удаляются, первая остаётся."""
+        apps = self.migrate('0013_timelineentry')
+        User = apps.get_model('auth', 'User')
+        Follow = apps.get_model('posts', 'Follow')
+        user = User.objects.create(username='MakarD')
+        author = User.objects.create(username='AndreyG')
+        first = Follow.objects.create(user=user, author=author)
+        Follow.objects.create(user=user, author=author)
+        other = Follow.objects.create(user=author, author=user)
+
+        apps = self.migrate('0014_feed_indexes')
+        Follow = apps.get_model('posts', 'Follow')
+        self.assertEqual(
+            sorted(Follow.objects.values_list('pk', flat=True)),
+            [first.pk, other.pk])
+
+    def test_author_stats_are_filled_for_many_users(self):
+        """Статистика заполняется и для сотен пользователей."""
+        apps = self.migrate('0016_post_thumbnails')
+        User = apps.get_model('auth', 'User')
+        User.objects.bulk_create(
+            [User(username=f'user{i}') for i in range(700)])
+        author = User.objects.get(username='user0')
+        apps.get_model('posts', 'Post').objects.create(
+            text='bla-bla-bla', author=author)
+
+        apps = self.migrate('0017_author_stats')
+        AuthorStats = apps.get_model('posts', 'AuthorStats')
+        self.assertEqual(AuthorStats.objects.count(), 700)
+        self.assertEqual(AuthorStats.objects.get(pk=author.pk).post_count, 1)
@@ -1,7 +1,10 @@
+from io import StringIO
+
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
 from django.test import TestCase
 
-from posts.models import Follow, Group, Post
+from posts.models import AuthorStats, Comment, Follow, Group, Post
 
 User = get_user_model()
 
@@ -65,3 +68,108 @@ class FollowModelTest(TestCase):
         self.assertFalse(Follow.objects.filter(
             author=FollowModelTest.follow.author,
             user=FollowModelTest.follow.user).exists())
+
+
+class CommentCountTest(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='MakarD')
+        cls.post = Post.objects.create(text='BlaBlaBla', author=cls.user)
+
+    def test_comment_count_follows_comments(self):
+        comment = Comment.objects.create(
+            text='first', post=CommentCountTest.post, author=self.user)
+        Comment.objects.create(
+            text='second', post=CommentCountTest.post, author=self.user)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 2)
+
+        comment.delete()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 1)
+
+    def test_rebuild_comment_counts(self):
+        Comment.objects.create(
+            text='first', post=CommentCountTest.post, author=self.user)
+        Post.objects.update(comment_count=42)
+        call_command('rebuild_comment_counts', stdout=StringIO())
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 1)
+
+
+class AuthorStatsTest(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='MakarD')
+        cls.reader = User.objects.create_user(username='AndreyG')
+
+    def stats(self, user):
+        return AuthorStats.objects.get(pk=user.pk)
+
+    def test_stats_follow_posts_and_follows(self):
+        first = Post.objects.create(text='first', author=self.user)
+        second = Post.objects.create(text='second', author=self.user)
+        follow = Follow.objects.create(user=self.reader, author=self.user)
+        stats = self.stats(self.user)
+        self.assertEqual(stats.post_count, 2)
+        self.assertEqual(stats.follower_count, 1)
+        self.assertEqual(stats.last_post, second.pub_date)
+        self.assertEqual(self.stats(self.reader).following_count, 1)
+
+        second.delete()
+        follow.delete()
+        stats = self.stats(self.user)
+        self.assertEqual(stats.post_count, 1)
+        self.assertEqual(stats.follower_count, 0)
+        self.assertEqual(stats.last_post, first.pub_date)
+        self.assertEqual(self.stats(self.reader).following_count, 0)
+
+    def test_reconcile_author_stats(self):
+        Post.objects.create(text='first', author=self.user)
+        AuthorStats.objects.all().delete()
+        Post.objects.bulk_create([Post(text='silent', author=self.user)])
+        call_command('reconcile_author_stats', stdout=StringIO())
+        self.assertEqual(self.stats(self.user).post_count, 2)
+        self.assertEqual(self.stats(self.reader).post_count, 0)
+
+    def test_reconcile_many_authors(self):
+        """Статистика создаётся для сотен авторов за один проход."""
+        User.objects.bulk_create(
+            [User(username=f'author{number}') for number in range(600)])
+        call_command('reconcile_author_stats', stdout=StringIO())
+        self.assertEqual(AuthorStats.objects.count(), 602)
+
+
+class PostVersionTest(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='MakarD')
+        cls.group = Group.objects.create(
+            title='Black', slug='black', description='Test description')
+
+    def version(self, post):
+        return Post.objects.values_list('version', flat=True).get(pk=post.pk)
+
+    def test_edit_bumps_version(self):
+        """После правки версия поста в памяти совпадает с версией в базе."""
+        post = Post.objects.create(text='first', author=self.user)
+        post.text = 'second'
+        post.save()
+        self.assertEqual(post.version, self.version(post))
+        post.save()
+        self.assertEqual(post.version, self.version(post))
+
+    def test_group_card_fields_bump_versions(self):
+        """Версии постов меняются, только если изменилось видное в карточке."""
+        post = Post.objects.create(
+            text='first', author=self.user, group=self.group)
+        before = self.version(post)
+        self.group.description = 'Another description'
+        self.group.save()
+        self.assertEqual(self.version(post), before)
+        self.group.title = 'White'
+        self.group.save()
+        self.assertEqual(self.version(post), before + 1)
@@ -0,0 +1,86 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+
+from core.paginator import KeysetPaginator
+
+from ..models import Post
+
+User = get_user_model()
+
+
+class KeysetPaginatorTest(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = User.objects.create(username='MakarD')
+        for i in range(25):
+            Post.objects.create(text=f'bla-bla-bla{i}', author=cls.user)
+        # Одинаковая дата у части постов проверяет второй ключ (pk).
+        Post.objects.filter(pk__lte=Post.objects.order_by('pk')[5].pk).update(
+            pub_date=timezone.now())
+
+    def setUp(self) -> None:
+        self.expected = list(Post.objects.order_by('-pub_date', '-pk'))
+
+    def test_cursor_walk_matches_offset_pages(self):
+        """Переход по курсорам вперёд и назад повторяет обычные страницы."""
+        paginator = KeysetPaginator(Post.objects.all(), 10)
+        page = paginator.get_page(None)
+        seen = list(page)
+        while page.next_cursor:
+            page = paginator.get_page(cursor=page.next_cursor)
+            seen.extend(page)
+        self.assertEqual(seen, self.expected)
+        self.assertEqual(page.number, 3)
+
+        page = paginator.get_page(cursor=page.previous_cursor)
+        self.assertEqual(page.number, 2)
+        self.assertEqual(list(page), self.expected[10:20])
+        page = paginator.get_page(cursor=page.previous_cursor)
+        self.assertIsNone(page.previous_cursor)
+        self.assertEqual(list(page), self.expected[:10])
+
+    def test_cursor_page_does_not_count(self):
+        paginator = KeysetPaginator(Post.objects.all(), 10)
+        cursor = paginator.get_page(1).next_cursor
+        with self.assertNumQueries(1):
+            page = paginator.get_page(cursor=cursor)
+            self.assertEqual(len(page), 10)
+
+    def test_invalid_cursor_falls_back_to_page_number(self):
+        paginator = KeysetPaginator(Post.objects.all(), 10)
+        page = paginator.get_page('2', cursor='not-a-cursor')
+        self.assertEqual(list(page), self.expected[10:20])
+
+    def test_count_limit_is_approximate(self):
+        paginator = KeysetPaginator(Post.objects.all(), 10, count_limit=15)
+        self.assertEqual(paginator.count, 15)
+        self.assertTrue(paginator.is_approximate)
+        paginator = KeysetPaginator(Post.objects.all(), 10, count=100)
+        self.assertEqual(paginator.num_pages, 10)
+
+    def test_page_links_are_a_list(self):
+        """Ссылки на страницы можно обойти дважды, считаются они один раз."""
+        paginator = KeysetPaginator(Post.objects.all(), 10)
+        page = paginator.get_page(1)
+        with self.assertNumQueries(1):
+            self.assertEqual(page.page_links, [1, 2, 3])
+            self.assertEqual(list(page.page_links), [1, 2, 3])
+
+    def test_elided_page_range(self):
+        """Ссылок на страницы немного при любом числе страниц."""
+        paginator = KeysetPaginator(Post.objects.all(), 10, count=10 ** 9)
+        gap = paginator.ELLIPSIS
+        self.assertEqual(
+            list(paginator.get_elided_page_range(1)),
+            [1, 2, 3, 4, gap, 99999999, 100000000])
+        self.assertEqual(
+            list(paginator.get_elided_page_range(50)),
+            [1, 2, gap, 47, 48, 49, 50, 51, 52, 53, gap,
+             99999999, 100000000])
+        self.assertEqual(list(KeysetPaginator(
+            Post.objects.all(), 10).get_elided_page_range(2)), [1, 2, 3])
+        paginator = KeysetPaginator(Post.objects.all(), 1, count_limit=20)
+        self.assertEqual(
+            list(paginator.get_elided_page_range(1)), [1, 2, 3, 4, gap])
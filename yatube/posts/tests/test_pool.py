@@ -0,0 +1,78 @@
+import os
+import sqlite3
+import tempfile
+
+from django.db import connection
+from django.test import SimpleTestCase
+
+from core.db.backends.sqlite3.base import DatabaseWrapper
+from core.db.pool import ConnectionPool, PoolTimeout
+
+
+def connect():
+    return sqlite3.connect(':memory:', check_same_thread=False)
+
+
+class ConnectionPoolTest(SimpleTestCase):
+    def test_connections_are_reused_and_bounded(self):
+        """Пул отдаёт вернувшиеся соединения и не открывает лишних."""
+        pool = ConnectionPool(1, timeout=0.01)
+        first = pool.acquire(connect)
+        with self.assertRaises(PoolTimeout):
+            pool.acquire(connect)
+        pool.release(first)
+        self.assertIs(pool.acquire(connect), first)
+        stats = pool.stats()
+        self.assertEqual(stats['checkouts'], 2)
+        self.assertEqual(stats['connections'], 1)
+        self.assertEqual(stats['timeouts'], 1)
+        self.assertEqual(stats['in_use'], 1)
+
+    def test_broken_and_old_connections_are_replaced(self):
+        pool = ConnectionPool(2, health_checks=True)
+        broken = pool.acquire(connect)
+        broken.close()
+        pool.release(broken)
+        self.assertIsNot(pool.acquire(connect), broken)
+        pool = ConnectionPool(1, recycle=0)
+        old = pool.acquire(connect)
+        pool.release(old)
+        self.assertIsNot(pool.acquire(connect), old)
+        self.assertEqual(pool.stats()['discarded'], 1)
+
+
+class PooledBackendTest(SimpleTestCase):
+    def setUp(self) -> None:
+        handle, self.path = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(handle)
+        self.settings_dict = dict(
+            connection.settings_dict, NAME=self.path, CONN_MAX_AGE=0,
+            POOL={'SIZE': 1, 'TIMEOUT': 0.01})
+
+    def tearDown(self) -> None:
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(self.path + suffix):
+                os.remove(self.path + suffix)
+
+    def test_pragmas_run_on_new_connections(self):
+        wrapper = DatabaseWrapper(
+            dict(self.settings_dict, POOL=None), alias='pragma-test')
+        with wrapper.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            self.assertEqual(cursor.fetchone()[0], 'wal')
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], 5000)
+        wrapper.close()
+
+    def test_closed_connection_goes_back_to_pool(self):
+        first = DatabaseWrapper(self.settings_dict, alias='pool-test')
+        second = DatabaseWrapper(self.settings_dict, alias='pool-test')
+        first.ensure_connection()
+        raw = first.connection
+        with self.assertRaises(PoolTimeout):
+            second.ensure_connection()
+        first.close()
+        second.ensure_connection()
+        self.assertIs(second.connection, raw)
+        second.close()
+        second.pool.close()
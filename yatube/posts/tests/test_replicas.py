@@ -0,0 +1,85 @@
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from core.db.replicas import (PIN_COOKIE, ReplicaRouter, current_replica,
+                              read_from_replica, replica_reads)
+
+from yatube.settings import set_up_paginator
+
+from .. import feed_cache, groups
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+@read_from_replica
+def replica_view(request):
+    return current_replica()
+
+
+@override_settings(REPLICA_DATABASES=['replica'])
+class ReplicaRoutingTest(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = User.objects.create(username='MakarD')
+        cls.author = User.objects.create(username='AndreyG')
+
+    def test_router(self):
+        """С реплики читаются только посты и только внутри ленты."""
+        router = ReplicaRouter()
+        self.assertEqual(router.db_for_read(Post), 'default')
+        with replica_reads('replica'):
+            self.assertEqual(router.db_for_read(Post), 'replica')
+            self.assertEqual(router.db_for_read(User), 'default')
+            self.assertEqual(router.db_for_write(Post), 'default')
+
+    def test_group_map_is_read_from_primary(self):
+        """Карта групп кэшируется надолго и читается с основной базы."""
+        Group.objects.create(title='Black', slug='black')
+        cache.clear()
+        # There is no 'replica' database here: reading from it would fail.
+        with replica_reads('replica'):
+            self.assertIn('black', groups.by_slug())
+
+    def test_writer_is_pinned_to_primary(self):
+        """После подписки браузер какое-то время читает с основной базы."""
+        client = Client()
+        client.force_login(self.user)
+        response = client.get(reverse(
+            'post:profile_follow', kwargs={'username': 'AndreyG'}))
+        cookie = response.cookies[PIN_COOKIE]
+        factory = RequestFactory()
+        request = factory.get('/')
+        self.assertEqual(replica_view(request), 'replica')
+        request = factory.get('/')
+        request.COOKIES[PIN_COOKIE] = cookie.value
+        self.assertIsNone(replica_view(request))
+        self.assertIsNone(replica_view(factory.post('/')))
+
+    def test_writer_skips_lagging_feed_cache(self):
+        """Закреплённый автор видит свой пост, даже если кэш ленты отстал."""
+        client = Client()
+        client.force_login(self.user)
+        client.get(reverse(
+            'post:profile_follow', kwargs={'username': 'AndreyG'}))
+        post = Post.objects.create(text='fresh post', author=self.user)
+        # A replica that has not caught up fills the cache for the version.
+        feed_cache.get_page(
+            'index', set_up_paginator(Post.objects.exclude(pk=post.pk)),
+            replica=True)
+        self.assertContains(client.get(reverse('post:index')), 'fresh post')
+
+    def test_replica_feed_pages_expire_with_the_pin(self):
+        cache.clear()
+        with mock.patch.object(feed_cache.cache, 'set',
+                               wraps=feed_cache.cache.set) as cache_set:
+            feed_cache.get_page(
+                'index', set_up_paginator(Post.objects.all()), replica=True)
+        self.assertLessEqual(
+            cache_set.call_args[1]['timeout'], settings.REPLICA_PIN_SECONDS)
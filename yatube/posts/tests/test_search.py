@@ -0,0 +1,78 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from ..models import Post
+from ..search import TABLE, search
+from ..stemmer import stem
+
+User = get_user_model()
+
+
+class SearchTest(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = User.objects.create(username='MakarD')
+        cls.cats = Post.objects.create(
+            text='Кошки любят спать. Кошки, кошки, кошки!', author=cls.user)
+        cls.cat = Post.objects.create(
+            text='Моя кошка спала весь день', author=cls.user)
+        cls.dog = Post.objects.create(
+            text='Собака гуляла во дворе', author=cls.user)
+
+    def setUp(self) -> None:
+        cache.clear()
+
+    def test_stem(self):
+        self.assertEqual(stem('кошками'), stem('кошка'))
+        self.assertEqual(stem('Ёлки'), 'елк')
+        self.assertEqual(stem('красивейший'), 'красив')
+
+    def test_word_forms_are_ranked(self):
+        """Поиск находит другие формы слова, лучшие совпадения первыми."""
+        posts, cursor = search('кошкам')
+        self.assertEqual(posts, [self.cats, self.cat])
+        self.assertIsNone(cursor)
+        self.assertEqual(search('кошка двор')[0], [])
+
+    def test_keyset_pages(self):
+        posts, cursor = search('кошка', limit=1)
+        self.assertEqual(posts, [self.cats])
+        posts, cursor = search('кошка', cursor, limit=1)
+        self.assertEqual(posts, [self.cat])
+        self.assertIsNone(cursor)
+
+    @override_settings(SEARCH_CANDIDATES=1)
+    def test_only_newest_matches_are_ranked(self):
+        """Ранжируются только самые новые совпадения."""
+        self.assertEqual(search('кошка')[0], [self.cat])
+
+    def test_index_follows_edits_and_deletes(self):
+        dog = Post.objects.get(pk=self.dog.pk)
+        dog.text = 'Кошка прогнала собаку'
+        dog.save()
+        self.assertIn(dog, search('кошка')[0])
+        self.assertEqual(search('гуляла')[0], [])
+        dog.delete()
+        self.assertEqual(search('собака')[0], [])
+
+    def test_search_page(self):
+        response = self.client.get(reverse('post:search'), {'q': 'собаки'})
+        self.assertEqual(list(response.context['posts']), [self.dog])
+        self.assertContains(response, 'Собака гуляла во дворе')
+
+
+@override_settings(JOBS_ALWAYS_EAGER=True)
+class SearchFlushTest(TransactionTestCase):
+    def test_flush_empties_index(self):
+        """После flush в индексе не остаётся строк удалённых постов."""
+        user = User.objects.create(username='MakarD')
+        Post.objects.create(text='Собака гуляла во дворе', author=user)
+        call_command('flush', interactive=False, verbosity=0)
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT COUNT(*) FROM {TABLE}')
+            self.assertEqual(cursor.fetchone(), (0,))
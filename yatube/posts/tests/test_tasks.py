@@ -0,0 +1,156 @@
+import os
+import shutil
+import tempfile
+from io import BytesIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from core import jobs
+from yatube import settings
+
+from .. import images
+from ..models import Follow, Notification, Post
+from ..tasks import make_thumbnails, notify_followers, send_digests
+
+User = get_user_model()
+TEMP_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+CALLS = []
+
+
+def remember(value):
+    CALLS.append(value)
+
+
+def explode():
+    raise ValueError('boom')
+
+
+@override_settings(
+    MEDIA_ROOT=os.path.join(TEMP_ROOT, 'media'),
+    JOBS_DIR=os.path.join(TEMP_ROOT, 'jobs'),
+    JOBS_ALWAYS_EAGER=False,
+)
+class JobsTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_ROOT, ignore_errors=True)
+
+    def setUp(self) -> None:
+        CALLS.clear()
+
+    def test_worker_runs_jobs_in_order(self):
+        jobs.enqueue(f'{__name__}.remember', 1)
+        jobs.enqueue(f'{__name__}.remember', value=2)
+        while jobs.work_one():
+            pass
+        self.assertEqual(CALLS, [1, 2])
+
+    def test_failed_job_is_retried_then_parked(self):
+        with self.assertLogs('core.jobs', 'ERROR'):
+            jobs.enqueue(f'{__name__}.explode')
+            while jobs.work_one():
+                pass
+        self.assertEqual(len(os.listdir(jobs._path(jobs.FAILED))), 1)
+
+    @override_settings(POST_IMAGE_MAX_SIDE=1000)
+    def test_make_thumbnails(self):
+        """Миниатюры создаются заранее и сохраняются в посте."""
+        buffer = BytesIO()
+        Image.new('RGBA', (1200, 800), (255, 0, 0, 0)).save(buffer, 'PNG')
+        user = User.objects.create(username='MakarD')
+        post = Post.objects.create(
+            text='bla-bla-bla',
+            author=user,
+            image=SimpleUploadedFile('big.png', buffer.getvalue()))
+        make_thumbnails(post.pk)
+
+        post.refresh_from_db()
+        self.assertNotEqual(post.image.name, 'posts/big.png')
+        self.assertTrue(post.image.name.endswith('.png'))
+        self.assertFalse(default_storage.exists('posts/big.png'))
+        with Image.open(post.image.path) as image:
+            self.assertEqual(image.format, 'PNG')
+            self.assertEqual(image.mode, 'RGBA')
+            self.assertEqual(image.width, 1000)
+        variants = post.thumbnail_list
+        self.assertEqual(
+            [(v['width'], v['height']) for v in variants],
+            settings.POST_IMAGE_SIZES)
+        self.assertEqual(post.version, 2)
+        for variant in variants:
+            for name in (variant['jpeg'], variant['webp']):
+                with Image.open(default_storage.path(name)) as image:
+                    self.assertEqual(
+                        image.size, (variant['width'], variant['height']))
+
+    @override_settings(POST_IMAGE_MAX_SIDE=1000)
+    def test_replaced_image_leaves_no_files(self):
+        """Если картинку заменили во время задачи, её файлы удаляются."""
+        buffer = BytesIO()
+        Image.new('RGB', (1200, 800), (255, 0, 0)).save(buffer, 'JPEG')
+        user = User.objects.create(username='MakarD')
+        post = Post.objects.create(
+            text='bla-bla-bla',
+            author=user,
+            image=SimpleUploadedFile('big.jpg', buffer.getvalue()))
+        render_variants = images.render_variants
+        shrunk, variants = [], []
+
+        def replace_meanwhile(field_file, prefix):
+            Post.objects.filter(pk=post.pk).update(image='posts/other.jpg')
+            shrunk.append(field_file.name)
+            variants.extend(render_variants(field_file, prefix))
+            return variants
+
+        with mock.patch.object(images, 'render_variants', replace_meanwhile):
+            make_thumbnails(post.pk)
+        self.assertNotEqual(shrunk, [post.image.name])
+        self.assertFalse(default_storage.exists(shrunk[0]))
+        for variant in variants:
+            self.assertFalse(default_storage.exists(variant['jpeg']))
+            self.assertFalse(default_storage.exists(variant['webp']))
+
+
+@override_settings(NOTIFY_BATCH_SIZE=2)
+class NotificationTest(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.author = User.objects.create(username='MakarD')
+        cls.readers = [
+            User.objects.create(
+                username=f'reader{i}', email=f'reader{i}@example.com')
+            for i in range(5)]
+        cls.readers[0].email = ''
+        cls.readers[0].save()
+        for reader in cls.readers:
+            Follow.objects.create(user=reader, author=cls.author)
+
+    def test_followers_are_notified_in_batches(self):
+        """Каждый подписчик получает уведомление о новом посте."""
+        post = Post.objects.create(text='bla-bla-bla', author=self.author)
+        with self.assertNumQueries(1 + 2 * 3 + 1):
+            notify_followers(post.pk)
+        self.assertEqual(
+            set(post.notifications.values_list('user', flat=True)),
+            {reader.pk for reader in self.readers})
+
+    def test_digest_lists_new_posts_once(self):
+        """В дайджесте все новые посты, повторно они не отправляются."""
+        for text in ('first post', 'second post'):
+            notify_followers(
+                Post.objects.create(text=text, author=self.author).pk)
+        self.assertEqual(send_digests(), 4)
+        self.assertEqual(len(mail.outbox), 4)
+        self.assertIn('first post', mail.outbox[0].body)
+        self.assertIn('second post', mail.outbox[0].body)
+        self.assertEqual(send_digests(), 0)
+        self.assertEqual(
+            Notification.objects.filter(emailed=False).count(), 2)
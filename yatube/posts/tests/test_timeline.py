@@ -0,0 +1,53 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Follow, Post, TimelineEntry
+
+User = get_user_model()
+
+
+class TimelineTest(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.reader = User.objects.create(username='MakarD')
+        cls.author = User.objects.create(username='AndreyG')
+        cls.old_post = Post.objects.create(
+            text='bla-bla-bla', author=cls.author)
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(TimelineTest.reader)
+
+    def feed(self):
+        response = self.client.get(reverse('post:follow_index'))
+        return list(response.context['page'])
+
+    def test_follow_backfills_and_unfollow_clears(self):
+        """Подписка переносит старые посты в ленту, отписка убирает их."""
+        self.client.get(reverse(
+            'post:profile_follow', kwargs={'username': self.author.username}))
+        self.assertEqual(self.feed(), [TimelineTest.old_post])
+
+        self.client.get(reverse(
+            'post:profile_unfollow',
+            kwargs={'username': self.author.username}))
+        self.assertEqual(self.feed(), [])
+        self.assertFalse(TimelineEntry.objects.exists())
+
+    def test_new_post_is_fanned_out(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(text='new', author=self.author)
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.reader, post=post).exists())
+        self.assertEqual(self.feed(), [post, TimelineTest.old_post])
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=0)
+    def test_popular_author_is_read_on_demand(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(text='new', author=self.author)
+        self.assertFalse(TimelineEntry.objects.filter(post=post).exists())
+        self.assertEqual(self.feed(), [post, TimelineTest.old_post])
@@ -0,0 +1,138 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from ..models import AuthorStats, Comment, Follow, Group, Post
+from ..search import search
+
+User = get_user_model()
+TEMP_DIR = tempfile.mkdtemp()
+
+
+class TransferTest(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = User.objects.create(username='MakarD')
+        cls.reader = User.objects.create(username='AndreyG')
+        cls.group = Group.objects.create(
+            title='Black', slug='black', description='Test description')
+        cls.post = Post.objects.create(
+            text='Кошка, "кавычки",\nи перенос строки',
+            author=cls.user,
+            group=cls.group)
+        Comment.objects.create(
+            text='first', post=cls.post, author=cls.reader)
+        Follow.objects.create(user=cls.reader, author=cls.user)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_DIR, ignore_errors=True)
+
+    def round_trip(self, extension):
+        paths = {}
+        for kind in ('posts', 'comments', 'follows'):
+            paths[kind] = os.path.join(TEMP_DIR, f'{kind}.{extension}')
+            call_command(
+                'export_posts', kind=kind, output=paths[kind],
+                stdout=StringIO())
+        expected = list(Post.objects.values_list(
+            'pk', 'text', 'pub_date', 'author', 'group'))
+        Post.objects.all().delete()
+        Follow.objects.all().delete()
+        AuthorStats.objects.all().delete()
+
+        for kind in ('posts', 'comments', 'follows'):
+            call_command(
+                'import_posts', paths[kind], kind=kind, batch_size=1,
+                stdout=StringIO(), stderr=StringIO())
+        self.assertEqual(list(Post.objects.values_list(
+            'pk', 'text', 'pub_date', 'author', 'group')), expected)
+        post = Post.objects.get()
+        self.assertEqual(post.comment_count, 1)
+        self.assertEqual(post.comments.get().author, self.reader)
+        stats = AuthorStats.objects.get(pk=self.user.pk)
+        self.assertEqual((stats.post_count, stats.follower_count), (1, 1))
+        self.assertEqual(search('кошки')[0], [post])
+        self.assertEqual(self.reader.timeline.get().post, post)
+
+    def test_ndjson_round_trip(self):
+        """Экспорт и импорт в NDJSON сохраняют посты, комментарии, подписки."""
+        self.round_trip('ndjson')
+
+    def test_csv_round_trip(self):
+        self.round_trip('csv')
+
+    def test_unknown_authors(self):
+        path = os.path.join(TEMP_DIR, 'stranger.ndjson')
+        with open(path, 'w') as stream:
+            stream.write('{"author": "stranger", "text": "hi"}\n')
+        out = StringIO()
+        call_command(
+            'import_posts', path, no_rebuild=True, stdout=out,
+            stderr=StringIO())
+        self.assertIn('skipped 1', out.getvalue())
+        call_command(
+            'import_posts', path, create_missing=True, no_rebuild=True,
+            stdout=StringIO(), stderr=StringIO())
+        self.assertTrue(Post.objects.filter(
+            author__username='stranger', text='hi').exists())
+
+    def import_into_database_with_posts(self, extension):
+        paths = {}
+        for kind in ('posts', 'comments'):
+            paths[kind] = os.path.join(TEMP_DIR, f'taken_{kind}.{extension}')
+            call_command(
+                'export_posts', kind=kind, output=paths[kind],
+                stdout=StringIO())
+        out = StringIO()
+        call_command(
+            'import_posts', paths['posts'], no_rebuild=True, stdout=out,
+            stderr=StringIO())
+        self.assertIn('Imported 0 posts', out.getvalue())
+        self.assertIn('skipped 1', out.getvalue())
+
+        Post.objects.filter(pk=self.post.pk).update(text='another post')
+        with self.assertRaises(CommandError):
+            call_command(
+                'import_posts', paths['posts'], no_rebuild=True,
+                stdout=StringIO(), stderr=StringIO())
+        self.assertEqual(
+            list(Post.objects.values_list('text', flat=True)),
+            ['another post'])
+
+        out = StringIO()
+        call_command(
+            'import_posts', paths['comments'], kind='comments',
+            no_rebuild=True, stdout=out, stderr=StringIO())
+        self.assertIn('Imported 0 comments', out.getvalue())
+        self.assertEqual(Comment.objects.count(), 1)
+
+    def test_import_ndjson_into_database_with_posts(self):
+        """Занятый другим постом id останавливает импорт."""
+        self.import_into_database_with_posts('ndjson')
+
+    def test_import_csv_into_database_with_posts(self):
+        self.import_into_database_with_posts('csv')
+
+    def test_malformed_dates_are_skipped(self):
+        path = os.path.join(TEMP_DIR, 'dates.ndjson')
+        with open(path, 'w') as stream:
+            for date in ('yesterday', '2021-13-01T00:00:00', '2021-07-11'):
+                stream.write(json.dumps({
+                    'author': 'MakarD', 'text': date, 'pub_date': date}))
+                stream.write('\n')
+        out = StringIO()
+        call_command(
+            'import_posts', path, no_rebuild=True, stdout=out,
+            stderr=StringIO())
+        self.assertIn('Imported 0 posts', out.getvalue())
+        self.assertIn('skipped 3', out.getvalue())
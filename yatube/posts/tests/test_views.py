@@ -1,10 +1,19 @@
 from django import forms
 from django.contrib.auth import get_user_model
 from django.core.cache import cache
-from django.test import Client, TestCase
+from django.db import connection
+from django.http import HttpResponse
+from django.test import Client, RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
-from ..models import Group, Post
+from core.esi import EsiMiddleware, fill
+from yatube import settings
+
+from yatube.settings import set_up_paginator
+
+from .. import etags, feed_cache
+from ..models import Comment, Follow, Group, Post
 
 User = get_user_model()
 
@@ -32,6 +41,7 @@ class PostsPagesTests(TestCase):
         )
 
     def setUp(self) -> None:
+        cache.clear()
         self.user = PostsPagesTests.user
         self.authorized_client = Client()
         self.authorized_client.force_login(self.user)
@@ -66,7 +76,7 @@ class PostsPagesTests(TestCase):
 
     def test_pages_shows_correct_context(self):
         """Шаблоны приложения posts/ сформированы с правильным контекстом."""
-        cache.delete('index_page')
+        cache.clear()
         reverses_pages = [
             reverse('post:index'),
             reverse(
@@ -115,20 +125,121 @@ class PostsPagesTests(TestCase):
                         self.assertIsInstance(form_field, expected)
 
     def test_cache_index(self):
-        response = self.authorized_client.get(reverse('post:index'))
-        first = response.context['posts'][0]
+        """Главная страница кэшируется целиком и сбрасывается при записи."""
+        cache.clear()
+        self.client.get(reverse('post:index'))
+        Post.objects.bulk_create([Post(
+            text='silent',
+            author=PostsPagesTests.user,
+            group=PostsPagesTests.group
+        )])
+
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('post:index'))
+        self.assertNotContains(response, 'silent')
+        etags.posts_changed()
+        feed_cache.invalidate('index')
+        response = self.client.get(reverse('post:index'))
+        self.assertEqual(response.context['posts'][0].text, 'silent')
+
         new_first = Post.objects.create(
             text='bla-bla-bla',
             author=PostsPagesTests.user,
             group=PostsPagesTests.group
         )
-
-        new_response = self.authorized_client.get(reverse('post:index'))
-        self.assertEqual(new_response.context['posts'][0], first)
-        cache.delete('index_page')
-        new_response = self.authorized_client.get(reverse('post:index'))
+        new_response = self.client.get(reverse('post:index'))
         self.assertEqual(new_response.context['posts'][0], new_first)
 
+    def test_feed_cache_keeps_page_ids(self):
+        paginator = set_up_paginator(Post.objects.all())
+        first = feed_cache.get_page('index', paginator)[0]
+        Post.objects.bulk_create([Post(text='silent', author=self.user)])
+        with self.assertNumQueries(1):
+            page = feed_cache.get_page(
+                'index', set_up_paginator(Post.objects.all()))
+        self.assertEqual(page[0], first)
+
+    def test_cached_page_punches_user_holes(self):
+        """Закэшированная страница показывает каждому свою навигацию."""
+        cache.clear()
+        url = reverse('post:group_list', kwargs={'slug': self.slug})
+        edit = reverse('post:post_edit', kwargs={
+            'username': self.username, 'post_id': self.post_id})
+        response = self.client.get(url)
+        self.assertContains(response, reverse('login'))
+        self.assertNotContains(response, edit)
+
+        response = self.authorized_client.get(url)
+        self.assertNotIn('page', response.context)
+        self.assertContains(response, edit)
+        self.assertContains(response, f'Пользователь: {self.username}')
+        self.assertNotContains(response, '<!--esi:')
+
+    def test_fragments_render_in_place_without_page_cache(self):
+        """Вне кэша страниц фрагменты рендерятся сразу, без маркеров."""
+        url = reverse('post:profile', kwargs={'username': self.username})
+        response = self.authorized_client.get(url)
+        self.assertContains(response, f'Пользователь: {self.username}')
+        self.assertNotContains(response, '<!--esi:')
+
+    def test_only_page_cache_responses_are_filled(self):
+        """Middleware трогает только ответы кэша и только известные дыры."""
+        request = RequestFactory().get('/')
+        request.user = PostsPagesTests.user
+        hole = '<!--esi:includes/nav.html?author=-->'
+        response = EsiMiddleware(lambda request: HttpResponse(hole))(request)
+        self.assertEqual(response.content.decode(), hole)
+
+        unknown = '<!--esi:posts/post_detail.html?post_id=1-->'
+        self.assertEqual(fill(unknown, request), unknown)
+        self.assertNotIn('<!--esi:', fill(hole, request))
+
+    def test_edit_button_does_not_leak_through_card_cache(self):
+        """Кнопка редактирования не попадает в общий кэш карточки."""
+        edit = reverse('post:post_edit', kwargs={
+            'username': self.username, 'post_id': self.post_id})
+        profile = reverse('post:profile', kwargs={'username': self.username})
+        self.authorized_client.get(profile)
+        response = self.client.get(reverse('post:index'))
+        self.assertNotContains(response, edit)
+
+        cache.clear()
+        other = Client()
+        other.force_login(PostsPagesTests.user2)
+        other.get(profile)
+        other.get(reverse('post:index'))
+        for url in (profile, reverse('post:index')):
+            response = self.authorized_client.get(url)
+            self.assertContains(response, edit)
+            self.assertNotContains(response, '<!--esi:')
+
+    def test_post_card_fragment_cache(self):
+        """Карточка поста берётся из кэша, пока не изменится её версия."""
+        cache.clear()
+        post = Post.objects.get(pk=self.post_id)
+        url = reverse('post:group_list', kwargs={'slug': self.slug})
+        self.authorized_client.get(url)
+        Post.objects.filter(pk=post.pk).update(text='silent edit')
+        response = self.authorized_client.get(url)
+        self.assertNotContains(response, 'silent edit')
+
+        post.text = 'visible edit'
+        post.save()
+        response = self.authorized_client.get(url)
+        self.assertContains(response, 'visible edit')
+
+    def test_profile_reads_stats(self):
+        """Профиль берёт счётчики из AuthorStats, а не считает посты."""
+        Follow.objects.create(
+            user=PostsPagesTests.user2, author=PostsPagesTests.user)
+        url = reverse('post:profile', kwargs={'username': self.username})
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertFalse(
+            [q for q in queries if 'COUNT(' in q['sql'].upper()])
+        self.assertEqual(response.context['count'], 1)
+        self.assertEqual(response.context['stats'].follower_count, 1)
+
     def test_follow(self):
         not_follow_index_response = self.authorized_client.get(reverse(
             'post:follow_index'))
@@ -168,6 +279,16 @@ class PostsPagesTests(TestCase):
         self.assertEqual(
             len(not_follow_index_response.context['page']), 0)
 
+    def test_follow_checks_login_before_author(self):
+        """Аноним попадает на вход, даже если автора нет."""
+        url = reverse('post:profile_follow', kwargs={'username': 'nobody'})
+        response = self.client.get(url)
+        self.assertRedirects(
+            response, settings.LOGIN_URL + '?next=' + url,
+            fetch_redirect_response=False)
+        response = self.authorized_client.get(url)
+        self.assertEqual(response.status_code, 404)
+
 
 class PaginatorViewsTest(TestCase):
     @classmethod
@@ -181,11 +302,152 @@ class PaginatorViewsTest(TestCase):
             )
 
     def test_first_page_contains_ten_records(self):
-        cache.delete('index_page')
+        cache.clear()
         response = self.client.get(reverse('post:index'))
         self.assertEqual(len(response.context['page']), 10)
 
     def test_second_page_contains_three_records(self):
-        cache.delete('index_page')
+        cache.clear()
         response = self.client.get(reverse('post:index') + '?page=2')
         self.assertEqual(len(response.context['page']), 3)
+
+
+class GroupPageTest(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='test-slug', description='Тест')
+        cls.other = Group.objects.create(
+            title='Другая группа', slug='other-slug', description='Тест')
+        cls.url = reverse('post:group_list', kwargs={'slug': 'test-slug'})
+
+    def add_posts(self, number):
+        start = Post.objects.count()
+        for i in range(start, start + number):
+            author = User.objects.create(username=f'author{i}')
+            Post.objects.create(
+                text=f'post{i}', author=author, group=self.group)
+
+    def test_query_count_does_not_grow(self):
+        """Число запросов к странице группы не зависит от авторов."""
+        self.add_posts(1)
+        cache.clear()
+        with CaptureQueriesContext(connection) as few:
+            self.client.get(self.url)
+        self.add_posts(9)
+        cache.clear()
+        with self.assertNumQueries(len(few)):
+            response = self.client.get(self.url)
+        self.assertEqual(response.context['page'].paginator.count, 10)
+        self.assertFalse(
+            [q for q in few if 'COUNT(' in q['sql'].upper()])
+
+    def test_post_count_follows_posts(self):
+        self.add_posts(2)
+        post = Post.objects.first()
+        post.group = self.other
+        post.save()
+        Post.objects.last().delete()
+        self.group.refresh_from_db()
+        self.other.refresh_from_db()
+        self.assertEqual(self.group.post_count, 0)
+        self.assertEqual(self.other.post_count, 1)
+
+    def test_cached_group_is_replaced_on_save(self):
+        cache.clear()
+        self.client.get(self.url)
+        group = Group.objects.get(pk=self.group.pk)
+        group.title = 'Новое название'
+        group.save()
+        response = self.client.get(self.url)
+        self.assertEqual(response.context['group'].title, 'Новое название')
+        self.assertEqual(
+            self.client.get('/group/missing/').status_code, 404)
+
+
+class PostDetailCommentsTest(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = User.objects.create(username='MakarD')
+        cls.post = Post.objects.create(text='bla-bla-bla', author=cls.user)
+        cls.url = reverse('post:post_detail', kwargs={
+            'username': cls.user.username, 'post_id': cls.post.pk})
+
+    def add_comments(self, number):
+        for i in range(number):
+            Comment.objects.create(
+                text=f'comment{i}', post=self.post, author=self.user)
+
+    def test_query_count_does_not_grow(self):
+        """Число запросов к странице поста не зависит от комментариев."""
+        self.add_comments(1)
+        cache.clear()
+        with CaptureQueriesContext(connection) as few:
+            self.client.get(self.url)
+        self.add_comments(2 * settings.COMMENTS_PAGE_SIZE)
+        cache.clear()
+        with self.assertNumQueries(len(few)):
+            self.client.get(self.url)
+
+    def test_load_more(self):
+        """Комментарии подгружаются частями по курсору."""
+        self.add_comments(settings.COMMENTS_PAGE_SIZE + 1)
+        response = self.client.get(self.url)
+        first = response.context['comments']
+        self.assertEqual(len(first), settings.COMMENTS_PAGE_SIZE)
+        cursor = response.context['comments_page'].next_cursor
+        response = self.client.get(self.url, {'cursor': cursor})
+        self.assertEqual(
+            [comment.text for comment in response.context['comments']],
+            ['comment0'])
+
+    def test_wrong_author_is_not_found(self):
+        other = User.objects.create(username='AndreyG')
+        response = self.client.get(reverse('post:post_detail', kwargs={
+            'username': other.username, 'post_id': self.post.pk}))
+        self.assertEqual(response.status_code, 404)
+
+
+class ConditionalGetTest(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = User.objects.create(username='MakarD')
+        cls.group = Group.objects.create(
+            title='Black', slug='black', description='Test description')
+        cls.post = Post.objects.create(
+            text='bla-bla-bla', author=cls.user, group=cls.group)
+        cls.urls = [
+            reverse('post:index'),
+            reverse('post:group_list', kwargs={'slug': cls.group.slug}),
+            reverse('post:profile', kwargs={'username': cls.user.username}),
+            reverse('post:post_detail', kwargs={
+                'username': cls.user.username, 'post_id': cls.post.pk}),
+        ]
+
+    def test_unchanged_pages_are_not_modified(self):
+        """Повторный запрос с ETag получает 304 почти без запросов к БД."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertIn('public', response['Cache-Control'])
+                etag = response['ETag']
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 304)
+                self.assertLessEqual(len(queries), 1)
+
+    def test_changes_and_users_change_etag(self):
+        etags = [self.client.get(url)['ETag'] for url in self.urls]
+        Comment.objects.create(text='new', post=self.post, author=self.user)
+        client = Client()
+        client.force_login(self.user)
+        for url, etag in zip(self.urls, etags):
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+                response = client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+                self.assertEqual(response.status_code, 200)
+                self.assertIn('private', response['Cache-Control'])
@@ -0,0 +1,99 @@
+"""Materialized follow feed.
+
+Posts are copied into their followers' timelines when they are published
+(fan-out on write). Authors with more than ``TIMELINE_FANOUT_LIMIT``
+followers (by the stored ``AuthorStats.follower_count``) are skipped at
+write time; their new posts are pulled into a reader's timeline when that
+reader opens the feed (fan-out on read).
+"""
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Max, Q
+
+from .models import Follow, Post, TimelineEntry
+
+ORDERING = ('-pub_date', '-post')
+
+
+def _entry(user_id, post):
+    return TimelineEntry(
+        user_id=user_id,
+        author_id=post.author_id,
+        post_id=post.pk,
+        pub_date=post.pub_date)
+
+
+def fan_out_post(post):
+    followers = Follow.objects.filter(author_id=post.author_id).exclude(
+        author__stats__follower_count__gt=settings.TIMELINE_FANOUT_LIMIT,
+    ).values_list('user_id', flat=True)
+    TimelineEntry.objects.bulk_create(
+        [_entry(user_id, post) for user_id in followers],
+        ignore_conflicts=True)
+
+
+def add_author(user_id, author_id):
+    posts = Post.objects.filter(author_id=author_id).only(
+        'pk', 'pub_date', 'author_id').order_by(
+        '-pub_date')[:settings.TIMELINE_BACKFILL_SIZE]
+    TimelineEntry.objects.bulk_create(
+        [_entry(user_id, post) for post in posts], ignore_conflicts=True)
+
+
+def remove_author(user_id, author_id):
+    TimelineEntry.objects.filter(user_id=user_id, author_id=author_id).delete()
+
+
+def backfill_all():
+    """Same rows add_author would write for every follow, in one statement.
+
+    For follows created in bulk, where signals did not fire.
+    """
+    sql = f'''
+        INSERT INTO {TimelineEntry._meta.db_table}
+            (user_id, author_id, post_id, pub_date)
+        SELECT f.user_id, p.author_id, p.id, p.pub_date
+        FROM {Follow._meta.db_table} f
+        JOIN (
+            SELECT id, author_id, pub_date, ROW_NUMBER() OVER (
+                PARTITION BY author_id ORDER BY pub_date DESC, id DESC
+            ) AS position
+            FROM {Post._meta.db_table}
+        ) p ON p.author_id = f.author_id
+        WHERE p.position <= %s
+        AND NOT EXISTS (
+            SELECT 1 FROM {TimelineEntry._meta.db_table} t
+            WHERE t.user_id = f.user_id AND t.post_id = p.id
+        )
+    '''
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(sql, [settings.TIMELINE_BACKFILL_SIZE])
+
+
+def pull_celebrity_posts(user):
+    authors = list(Follow.objects.filter(
+        user=user,
+        author__stats__follower_count__gt=settings.TIMELINE_FANOUT_LIMIT,
+    ).values_list('author', flat=True))
+    if not authors:
+        return
+    latest = dict(TimelineEntry.objects.filter(
+        user=user, author__in=authors).values('author').annotate(
+        latest=Max('pub_date')).values_list('author', 'latest'))
+    condition = Q()
+    for author_id in authors:
+        if author_id in latest:
+            condition |= Q(author_id=author_id, pub_date__gt=latest[author_id])
+        else:
+            condition |= Q(author_id=author_id)
+    posts = Post.objects.filter(condition).only(
+        'pk', 'pub_date', 'author_id').order_by(
+        '-pub_date')[:settings.TIMELINE_BACKFILL_SIZE]
+    TimelineEntry.objects.bulk_create(
+        [_entry(user.pk, post) for post in posts], ignore_conflicts=True)
+
+
+def user_timeline(user):
+    pull_celebrity_posts(user)
+    return TimelineEntry.objects.filter(user=user).select_related(
+        'post__author', 'post__group')
@@ -0,0 +1,99 @@
+"""Row formats shared by the export_posts and import_posts commands.
+
+Rows are flat dicts: users are referenced by username, groups by slug,
+posts by id. Ids are kept on import so that comments still point at their
+posts, so an import stops at an id that another row already has. Files
+are NDJSON (one JSON object per line) or CSV with a header; both are read
+and written one row at a time.
+"""
+import csv
+import json
+
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Comment, Follow, Post
+
+FORMATS = ('ndjson', 'csv')
+
+KINDS = {
+    'posts': (Post, (
+        ('id', 'pk'),
+        ('author', 'author__username'),
+        ('group', 'group__slug'),
+        ('text', 'text'),
+        ('pub_date', 'pub_date'),
+        ('image', 'image'),
+    )),
+    'comments': (Comment, (
+        ('id', 'pk'),
+        ('post', 'post_id'),
+        ('author', 'author__username'),
+        ('text', 'text'),
+        ('created', 'created'),
+    )),
+    'follows': (Follow, (
+        ('user', 'user__username'),
+        ('author', 'author__username'),
+    )),
+}
+
+
+def columns(kind):
+    return [name for name, _ in KINDS[kind][1]]
+
+
+def export_rows(kind, chunk_size):
+    model, fields = KINDS[kind]
+    names = columns(kind)
+    values = model.objects.order_by('pk').values_list(
+        *[lookup for _, lookup in fields])
+    for row in values.iterator(chunk_size=chunk_size):
+        yield {
+            name: value.isoformat() if hasattr(value, 'isoformat') else value
+            for name, value in zip(names, row)}
+
+
+def guess_format(path, default='ndjson'):
+    return 'csv' if path.endswith('.csv') else default
+
+
+def write_rows(stream, format, kind, rows):
+    """Write ``rows`` to ``stream``; yield after each row for progress."""
+    if format == 'csv':
+        writer = csv.DictWriter(stream, fieldnames=columns(kind))
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+            yield row
+        return
+    for row in rows:
+        stream.write(json.dumps(row, ensure_ascii=False) + '\n')
+        yield row
+
+
+def read_rows(stream, format):
+    if format == 'csv':
+        for row in csv.DictReader(stream):
+            yield {name: value or None for name, value in row.items()}
+        return
+    for line in stream:
+        if line.strip():
+            yield json.loads(line)
+
+
+def parse_id(value):
+    """An int id (CSV keeps them as strings); ValueError if malformed."""
+    return None if value in (None, '') else int(value)
+
+
+def parse_date(value):
+    """An aware datetime; ValueError for malformed or impossible dates."""
+    if not value:
+        return timezone.now()
+    date = parse_datetime(value)
+    if date is None:
+        raise ValueError(f'Not a date: {value!r}')
+    if timezone.is_naive(date):
+        date = timezone.make_aware(date, timezone.utc)
+    return date
@@ -7,6 +7,7 @@ urlpatterns = [
     path('', views.index, name='index'),
     path('follow/', views.follow_index, name='follow_index'),
     path('new/', views.post_create, name='post_create'),
+    path('search/', views.search, name='search'),
     path('<str:username>/', views.profile, name='profile'),
     path(
         '<str:username>/<int:post_id>/edit/',
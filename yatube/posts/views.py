@@ -1,11 +1,59 @@
+from functools import wraps
+
 from django.contrib.auth.decorators import login_required
-from django.core.cache import cache
+from django.contrib.auth.views import redirect_to_login
+from django.db import transaction
+from django.http import Http404
 from django.shortcuts import get_object_or_404, redirect, render
 
-from yatube.settings import set_up_paginator
+from core import jobs
+from core.db.replicas import is_pinned, pin, read_from_replica
+from core.esi import cache_page
+from core.http import conditional_page
+from core.paginator import KeysetPaginator
+from core.parallel import gather
+from yatube.settings import COMMENTS_PAGE_SIZE, set_up_paginator
 
+from . import etags, feed_cache, groups, stats
 from .forms import CommentForm, PostForm
-from .models import Follow, Group, Post, User
+from .models import Comment, Follow, Post, User
+from .search import search as find_posts
+from .timeline import ORDERING as TIMELINE_ORDERING
+from .timeline import user_timeline
+
+COMMENT_ORDERING = ('-created', '-pk')
+
+
+def login_required_gathering(lookup):
+    """``login_required`` that runs ``lookup(**kwargs)`` meanwhile.
+
+    The viewer's session and user load while the view's own row is read;
+    the view gets that row instead of its URL arguments. Anonymous users
+    are sent to log in even when the row does not exist.
+    """
+    def find(**kwargs):
+        try:
+            return lookup(**kwargs)
+        except Http404 as error:
+            return error
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, **kwargs):
+            authenticated, found = gather(
+                lambda: request.user.is_authenticated,
+                lambda: find(**kwargs))
+            if not authenticated:
+                return redirect_to_login(request.get_full_path())
+            if isinstance(found, Http404):
+                raise found
+            return view(request, found)
+        return wrapper
+    return decorator
+
+
+def get_author(username):
+    return get_object_or_404(User, username=username)
 
 
 def page_not_found(request, exception):
@@ -21,29 +69,43 @@ def server_error(request):
     return render(request, 'misc/500.html', status=500)
 
 
-def index(request):
-    post_list = cache.get('index_page')
-    if post_list is None:
-        post_list = Post.objects.select_related(
-            'group',
-            'author').order_by('-pub_date')
-        cache.set('index_page', post_list, timeout=20)
+def schedule_thumbnails(post):
+    transaction.on_commit(
+        lambda: jobs.enqueue('posts.tasks.make_thumbnails', post.pk))
 
+
+@conditional_page(etags.index)
+@cache_page(etags.POSTS)
+@read_from_replica
+def index(request):
+    post_list = Post.objects.select_related('group', 'author')
     paginator = set_up_paginator(post_list)
     page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    cursor = request.GET.get('cursor')
+    if is_pinned(request):
+        # The writer reads its own post from the primary, past the cache.
+        page = paginator.get_page(page_number, cursor)
+    else:
+        page = feed_cache.get_page(
+            'index', paginator, page_number, cursor,
+            replica=getattr(request, 'replica', None) is not None)
     title = 'Последние обновления на сайте'
 
-    context = {'posts': post_list, 'page': page, 'title': title}
+    context = {'posts': page.object_list, 'page': page, 'title': title}
     return render(request, 'index.html', context)
 
 
+@conditional_page(etags.group_posts)
+@cache_page(etags.POSTS)
+@read_from_replica
 def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
-    post_list = group.posts.all().order_by('-pub_date')
-    paginator = set_up_paginator(post_list)
+    group = groups.get(slug)
+    if group is None:
+        raise Http404('No Group matches the given query.')
+    post_list = group.posts.select_related('author', 'group')
+    paginator = set_up_paginator(post_list, count=group.post_count)
     page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    page = paginator.get_page(page_number, request.GET.get('cursor'))
 
     title = f'Записи сообщества {group}'
     header = group
@@ -57,13 +119,16 @@ def group_posts(request, slug):
     return render(request, 'posts/group_list.html', context)
 
 
+@conditional_page(etags.profile)
+@read_from_replica
 def profile(request, username):
-    user = get_object_or_404(User, username=username)
-    post_list = user.posts.all().order_by('-pub_date')
-    count = user.posts.all().count()
-    paginator = set_up_paginator(post_list)
+    user = get_object_or_404(
+        User.objects.select_related('stats'), username=username)
+    author_stats = stats.for_user(user)
+    post_list = user.posts.select_related('author', 'group')
+    paginator = set_up_paginator(post_list, count=author_stats.post_count)
     page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    page = paginator.get_page(page_number, request.GET.get('cursor'))
     title = f'Записи пользователя {user}.'
 
     following = False
@@ -74,7 +139,8 @@ def profile(request, username):
 
     context = {
         'author': user,
-        'count': count,
+        'count': author_stats.post_count,
+        'stats': author_stats,
         'posts': post_list,
         'page': page,
         'title': title,
@@ -82,26 +148,54 @@ def profile(request, username):
     return render(request, 'posts/profile.html', context)
 
 
+def search(request):
+    query = request.GET.get('q', '').strip()
+    posts, next_cursor = [], None
+    if query:
+        posts, next_cursor = find_posts(query, request.GET.get('cursor'))
+    title = f'Поиск: {query}' if query else 'Поиск'
+
+    context = {
+        'posts': posts,
+        'query': query,
+        'next_cursor': next_cursor,
+        'title': title}
+    return render(request, 'posts/search.html', context)
+
+
+def get_post(username, post_id):
+    return get_object_or_404(
+        Post.objects.select_related('author', 'group'),
+        pk=post_id,
+        author__username=username)
+
+
+def comments_page(request, post_id, count=None):
+    paginator = KeysetPaginator(
+        Comment.objects.filter(post_id=post_id).select_related('author'),
+        COMMENTS_PAGE_SIZE,
+        ordering=COMMENT_ORDERING,
+        count=count)
+    return paginator.get_page(
+        request.GET.get('page'), request.GET.get('cursor'))
+
+
+@conditional_page(etags.post_detail)
 def post_detail(request, username, post_id):
-    post = get_object_or_404(Post, pk=post_id)
+    if request.method == 'POST':
+        return add_comment(request, username=username, post_id=post_id)
+    # The comments only need the id from the URL, so both run at once.
+    post, comments = gather(
+        lambda: get_post(username, post_id),
+        lambda: comments_page(request, post_id))
+    comments.paginator.count = post.comment_count
     title = post.text[:30]
-    comments = post.comments.all().order_by('-created')
-    form = CommentForm(request.POST or None)
-    post = get_object_or_404(Post, pk=post_id)
-    user = get_object_or_404(User, username=username)
-    if form.is_valid():
-        comment = form.save(commit=False)
-        comment.author = user
-        comment.post = post
-        form.save()
-        return redirect(
-            'post:post_detail',
-            username=user.username,
-            post_id=post_id)
+    form = CommentForm()
     context = {
         'form': form,
         'post': post,
-        'comments': comments,
+        'comments': comments.object_list,
+        'comments_page': comments,
         'title': title,
         'is_comment': True}
     return render(request, 'posts/post_detail.html', context)
@@ -117,6 +211,9 @@ def post_create(request):
         text = form.save(commit=False)
         text.author = request.user
         text.save()
+        if text.image:
+            schedule_thumbnails(text)
+        pin(request)
         return redirect('post:index')
     context = {'form': form}
     return render(request, 'posts/create_post.html', context)
@@ -140,6 +237,9 @@ def post_edit(request, username, post_id):
     )
     if form.is_valid():
         form.save()
+        if 'image' in form.changed_data:
+            schedule_thumbnails(post)
+        pin(request)
         return redirect(
             'post:post_detail',
             username=author.username,
@@ -148,53 +248,57 @@ def post_edit(request, username, post_id):
     return render(request, 'posts/create_post.html', context)
 
 
-@login_required
-def add_comment(request, username, post_id):
+@login_required_gathering(get_post)
+def add_comment(request, post):
     form = CommentForm(request.POST or None)
-    post = get_object_or_404(Post, pk=post_id)
-    user = get_object_or_404(User, username=username)
     if form.is_valid():
         comment = form.save(commit=False)
-        comment.author = user
+        comment.author = request.user
         comment.post = post
-        form.save()
+        with transaction.atomic():
+            form.save()
+        pin(request)
         return redirect(
             'post:post_detail',
-            username=user.username,
-            post_id=post_id)
+            username=post.author.username,
+            post_id=post.pk)
+    comments = comments_page(request, post.pk, post.comment_count)
     context = {
         'form': form,
         'post': post,
+        'comments': comments.object_list,
+        'comments_page': comments,
         'is_comment': True}
     return render(request, 'posts/post_detail.html', context)
 
 
 @login_required
+@read_from_replica
 def follow_index(request):
     user = request.user
-    post_list = Post.objects.filter(
-        author__following__user=user).order_by('-pub_date')
-    paginator = set_up_paginator(post_list)
+    paginator = set_up_paginator(
+        user_timeline(user), ordering=TIMELINE_ORDERING)
     page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    page = paginator.get_page(page_number, request.GET.get('cursor'))
+    page.object_list = [entry.post for entry in page]
     title = 'Избранные авторы'
 
-    context = {'posts': post_list, 'page': page, 'title': title}
+    context = {'posts': page.object_list, 'page': page, 'title': title}
     return render(request, 'posts/follow.html', context)
 
 
-@login_required
-def profile_follow(request, username):
+@login_required_gathering(get_author)
+def profile_follow(request, author):
     user = request.user
-    author = get_object_or_404(User, username=username)
     if author != user:
         Follow.objects.get_or_create(user=user, author=author)
+        pin(request)
     return redirect('post:profile', username=(author.username))
 
 
-@login_required
-def profile_unfollow(request, username):
+@login_required_gathering(get_author)
+def profile_unfollow(request, author):
     user = request.user
-    author = get_object_or_404(User, username=username)
     Follow.objects.filter(user=user, author=author).delete()
+    pin(request)
     return redirect('post:profile', username=(author.username))
@@ -0,0 +1,21 @@
+"""
+ASGI config for yatube project.
+
+It exposes the ASGI callable as a module-level variable named
+``application``, for servers such as uvicorn or daphne:
+``uvicorn yatube.asgi:application``. Django 2.2 has no ASGI handler, so
+requests go to the WSGI application on a thread pool (see ``core.asgi``).
+"""
+
+import os
+
+from django.conf import settings
+from django.core.wsgi import get_wsgi_application
+
+from core.asgi import WsgiToAsgi
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+
+application = WsgiToAsgi(
+    get_wsgi_application(), settings.ASGI_THREADS,
+    settings.FILE_UPLOAD_MAX_MEMORY_SIZE)
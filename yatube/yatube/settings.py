@@ -12,7 +12,7 @@ https://docs.djangoproject.com/en/2.2/ref/settings/
 
 import os
 
-from django.core.paginator import Paginator
+from core.paginator import KeysetPaginator
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -41,6 +41,7 @@ INSTALLED_APPS = [
     'about',
     'users',
     'posts',
+    'api',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -51,6 +52,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.QueryBudgetMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -58,6 +60,8 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.esi.EsiMiddleware',
+    'core.db.replicas.ReplicaPinMiddleware',
 ]
 
 ROOT_URLCONF = 'yatube.urls'
@@ -81,22 +85,102 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'yatube.wsgi.application'
+ASGI_APPLICATION = 'yatube.asgi.application'
+# Requests the ASGI entry point runs at once.
+ASGI_THREADS = int(os.environ.get('ASGI_THREADS', 8))
+# Threads running independent queries of a view in parallel, 0 to turn
+# off. The connection pool should fit ASGI_THREADS plus these.
+PARALLEL_QUERY_WORKERS = int(os.environ.get('PARALLEL_QUERY_WORKERS', 4))
 
 
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+# Connections come from a bounded pool per process (core.db.pool) and go
+# back to it when a request ends; DB_POOL_SIZE=0 turns the pool off, and
+# DB_CONN_MAX_AGE then keeps a connection per thread instead. PostgreSQL
+# is used when POSTGRES_DB is set.
+DATABASE_POOL = {
+    'SIZE': int(os.environ.get('DB_POOL_SIZE', 16)),
+    'TIMEOUT': 10,
+    'RECYCLE': 3600,
+}
+if os.environ.get('POSTGRES_DB'):
+    DATABASE = {
+        'ENGINE': 'core.db.backends.postgresql',
+        'NAME': os.environ['POSTGRES_DB'],
+        'USER': os.environ.get('POSTGRES_USER', ''),
+        'PASSWORD': os.environ.get('POSTGRES_PASSWORD', ''),
+        'HOST': os.environ.get('DB_HOST', ''),
+        'PORT': os.environ.get('DB_PORT', ''),
+    }
+else:
+    DATABASE = {
+        'ENGINE': 'core.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        # Run on every new connection. In WAL mode readers do not wait for
+        # a writer; busy_timeout (ms) makes writers queue instead of fail.
+        'PRAGMAS': {
+            'journal_mode': 'wal',
+            'synchronous': 'normal',
+            'mmap_size': 256 * 1024 * 1024,
+            'cache_size': -64 * 1024,
+            'busy_timeout': 5000,
+            'temp_store': 'memory',
+        },
     }
+DATABASES = {
+    'default': dict(
+        DATABASE,
+        CONN_MAX_AGE=int(os.environ.get('DB_CONN_MAX_AGE', 0)),
+        CONN_HEALTH_CHECKS=True,
+        POOL=DATABASE_POOL),
 }
+# Feed pages read posts from a replica: DB_REPLICA is a file for SQLite
+# (refreshed by `manage.py sync_replica`) or a host for PostgreSQL. Tests
+# read the replica through the primary's connection.
+if os.environ.get('DB_REPLICA'):
+    location = 'HOST' if os.environ.get('POSTGRES_DB') else 'NAME'
+    DATABASES['replica'] = dict(
+        DATABASES['default'], TEST={'MIRROR': 'default'})
+    DATABASES['replica'][location] = os.environ['DB_REPLICA']
+DATABASE_ROUTERS = ['core.db.replicas.ReplicaRouter']
+REPLICA_DATABASES = [alias for alias in DATABASES if alias != 'default']
+REPLICA_APPS = ['posts']
+# After writing, a browser reads from the primary for this many seconds.
+REPLICA_PIN_SECONDS = 10
+
+# Every process keeps a small LRU in front of the shared cache. The shared
+# tier is Redis when REDIS_URL is set (needs django-redis), a directory
+# shared by local processes when SHARED_CACHE_DIR is set, and per-process
+# memory otherwise.
+if os.environ.get('REDIS_URL'):
+    SHARED_CACHE = {
+        'BACKEND': 'django_redis.cache.RedisCache',
+        'LOCATION': os.environ['REDIS_URL'],
+    }
+elif os.environ.get('SHARED_CACHE_DIR'):
+    SHARED_CACHE = {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ['SHARED_CACHE_DIR'],
+    }
+else:
+    SHARED_CACHE = {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'shared',
+    }
 
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+        'BACKEND': 'core.caching.TwoTierCache',
+        'LOCATION': 'default',
+        'OPTIONS': {
+            'SHARED': 'shared',
+            'LOCAL_MAX_BYTES': 32 * 1024 * 1024,
+            'LOCAL_TIMEOUT': 5,
+        },
+    },
+    'shared': SHARED_CACHE,
 }
 
 
@@ -148,6 +232,88 @@ LOGIN_REDIRECT_URL = 'post:index'
 EMAIL_BACKEND = "django.core.mail.backends.filebased.EmailBackend"
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, "sent_emails")
 
+# Authors with more followers than this are not copied into timelines when
+# they publish; their posts are pulled in when a follower reads the feed.
+TIMELINE_FANOUT_LIMIT = 10000
+TIMELINE_BACKFILL_SIZE = 1000
+
+FEED_CACHE_TIMEOUT = 20
+
+# Seconds shared HTTP caches may keep pages rendered for anonymous users.
+HTTP_CACHE_MAX_AGE = 60
+# Whole feed pages are cached with holes for per-user fragments; entries
+# are dropped at once when posts change, the timeout only bounds memory.
+PAGE_CACHE_TIMEOUT = 600
+# Fragments the page cache leaves as holes and fills for every request.
+ESI_TEMPLATES = (
+    'includes/nav.html',
+    'posts/includes/menu.html',
+    'posts/includes/edit_button.html',
+)
+
+# Comments under a post are shown in chunks with a "load more" link.
+COMMENTS_PAGE_SIZE = 20
+
+# Full-text search ranks only this many of the newest matches.
+SEARCH_CANDIDATES = 1000
+
+# Background jobs; run `manage.py run_worker`, or set JOBS_ALWAYS_EAGER=1
+# to run them inside the request.
+JOBS_DIR = os.path.join(BASE_DIR, 'jobs')
+JOBS_ALWAYS_EAGER = os.environ.get('JOBS_ALWAYS_EAGER') == '1'
+JOBS_MAX_ATTEMPTS = 3
+
+# New posts are announced to followers by a background job; digests of
+# unread announcements are mailed by `manage.py send_digests`.
+NOTIFY_BATCH_SIZE = 1000
+DIGEST_BATCH_SIZE = 100
+SITE_URL = 'http://localhost:8000'
+
+# Uploads are streamed to disk in chunks; bytes past the limit are dropped.
+FILE_UPLOAD_HANDLERS = ['core.uploads.StreamingUploadHandler']
+FILE_UPLOAD_MAX_SIZE = 10 * 1024 * 1024
+
+# Card image variants (width, height), largest first.
+POST_IMAGE_SIZES = [(960, 339), (640, 226), (320, 113)]
+POST_IMAGE_QUALITY = 85
+POST_IMAGE_MAX_PIXELS = 50 * 1000 * 1000
+# Originals with a longer side are shrunk by the thumbnail job.
+POST_IMAGE_MAX_SIDE = 2560
+
+# JSON API: default and largest page, most posts fetched by ids at once.
+API_PAGE_SIZE = 20
+API_PAGE_SIZE_MAX = 100
+API_BULK_LIMIT = 100
+
+# Maximum number of SQL queries per request, by resolved view name.
+# QUERY_BUDGET=1 counts queries and logs views over budget;
+# QUERY_BUDGET_STRICT=1 fails those requests instead. The test runners
+# always fail them.
+QUERY_BUDGET_ENABLED = os.environ.get('QUERY_BUDGET') == '1'
+QUERY_BUDGET_STRICT = os.environ.get('QUERY_BUDGET_STRICT') == '1'
+TEST_RUNNER = 'core.testing.QueryBudgetRunner'
+QUERY_BUDGETS = {
+    'post:index': 6,
+    'post:group_list': 5,
+    'post:profile': 6,
+    'post:post_detail': 6,
+    'post:follow_index': 8,
+    'post:post_create': 10,
+    'post:post_edit': 11,
+    'post:add_comment': 8,
+    'post:profile_follow': 11,
+    'post:profile_unfollow': 9,
+    'post:search': 4,
+    'api:posts': 13,
+    'api:post': 11,
+    'api:comments': 8,
+    'api:groups': 2,
+    'api:group': 2,
+    'api:feed': 8,
+    'api:follows': 12,
+    'api:follow': 8,
+}
+
 
-def set_up_paginator(objects):
-    return Paginator(objects, 10)
+def set_up_paginator(objects, **kwargs):
+    return KeysetPaginator(objects, 10, **kwargs)